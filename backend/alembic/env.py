@@ -7,6 +7,13 @@ from alembic import context
 
 from app.core.database import Base
 from app.models.contest import Contest  # モデルをインポート
+from app.models.contest_change import ContestChange, ContestChangeWatermark
+from app.models.contest_history import ContestHistory
+from app.models.source_snapshot import SourceSnapshot
+from app.models.backfill_checkpoint import BackfillCheckpoint
+from app.models.setting import Setting
+from app.models.calendar_sync_state import CalendarSyncState
+from app.models.calendar_event_link import CalendarEventLink
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
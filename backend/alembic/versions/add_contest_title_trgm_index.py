@@ -0,0 +1,40 @@
+"""add trigram indexes on contest titles
+
+Revision ID: add_contest_title_trgm_index
+Revises: create_contest_history_table
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_contest_title_trgm_index'
+down_revision = 'create_contest_history_table'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # トライグラムインデックスはPostgreSQLのみ（SQLiteでは部分一致検索にフォールバック）
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_contests_title_trgm',
+        'contests',
+        ['title'],
+        postgresql_using='gin',
+        postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_contest_history_title_trgm',
+        'contest_history',
+        ['title'],
+        postgresql_using='gin',
+        postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_contest_history_title_trgm', table_name='contest_history')
+    op.drop_index('ix_contests_title_trgm', table_name='contests')
@@ -0,0 +1,50 @@
+"""add user_id to settings
+
+Revision ID: add_user_id_to_settings
+Revises: create_backfill_checkpoints_table
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_id_to_settings'
+down_revision = 'create_backfill_checkpoints_table'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # settings テーブルはこれまでアプリ起動時に作成されていたため、存在しない場合はここで作成する
+    if not sa.inspect(op.get_bind()).has_table('settings'):
+        op.create_table(
+            'settings',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('platform', sa.String(), nullable=True),
+            sa.Column('notify_before_min', sa.Integer(), nullable=True),
+            sa.Column('enabled', sa.Boolean(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_settings_id', 'settings', ['id'])
+        op.create_index('ix_settings_platform', 'settings', ['platform'])
+
+    # 既存の設定は誰のものか分からないため 'anonymous' として残す（検証済みのユーザーからは参照されない）
+    op.add_column('settings', sa.Column('user_id', sa.String(), nullable=False, server_default='anonymous'))
+    op.add_column('settings', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_settings_user_id', 'settings', ['user_id'])
+    # 一意制約を付ける前に、同じ (user_id, platform) の重複した設定は最新（id が最大）の1件だけを残す
+    op.execute(
+        "DELETE FROM settings WHERE id NOT IN "
+        "(SELECT max_id FROM (SELECT MAX(id) AS max_id FROM settings GROUP BY user_id, platform) AS latest)"
+    )
+    # SQLite は ALTER COLUMN と制約の追加に対応していないため batch モードで行う
+    with op.batch_alter_table('settings') as batch_op:
+        batch_op.alter_column('user_id', server_default=None)
+        batch_op.create_unique_constraint('uq_settings_user_platform', ['user_id', 'platform'])
+
+def downgrade():
+    with op.batch_alter_table('settings') as batch_op:
+        batch_op.drop_constraint('uq_settings_user_platform', type_='unique')
+    op.drop_index('ix_settings_user_id', table_name='settings')
+    op.drop_column('settings', 'updated_at')
+    op.drop_column('settings', 'user_id')
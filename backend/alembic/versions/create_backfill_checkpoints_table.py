@@ -0,0 +1,31 @@
+"""create backfill_checkpoints table
+
+Revision ID: create_backfill_checkpoints_table
+Revises: create_source_snapshots_table
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'create_backfill_checkpoints_table'
+down_revision = 'create_source_snapshots_table'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'backfill_checkpoints',
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('last_start_time', sa.DateTime(), nullable=True),
+        sa.Column('last_platform', sa.String(), nullable=True),
+        sa.Column('last_id', sa.String(), nullable=True),
+        sa.Column('rows_written', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('source')
+    )
+
+def downgrade():
+    op.drop_table('backfill_checkpoints')
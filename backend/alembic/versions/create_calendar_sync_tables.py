@@ -0,0 +1,43 @@
+"""create calendar_sync_states and calendar_event_links tables
+
+Revision ID: create_calendar_sync_tables
+Revises: add_user_id_to_settings
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'create_calendar_sync_tables'
+down_revision = 'add_user_id_to_settings'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'calendar_sync_states',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('calendar_id', sa.String(), nullable=False),
+        sa.Column('sync_token', sa.String(), nullable=True),
+        sa.Column('last_full_sync_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id', 'calendar_id')
+    )
+    op.create_table(
+        'calendar_event_links',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('calendar_id', sa.String(), nullable=False),
+        sa.Column('platform', sa.String(), nullable=False),
+        sa.Column('contest_id', sa.String(), nullable=False),
+        sa.Column('event_id', sa.String(), nullable=False),
+        sa.Column('content_hash', sa.String(), nullable=True),
+        sa.Column('etag', sa.String(), nullable=True),
+        sa.Column('removed', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id', 'calendar_id', 'platform', 'contest_id')
+    )
+
+def downgrade():
+    op.drop_table('calendar_event_links')
+    op.drop_table('calendar_sync_states')
@@ -0,0 +1,27 @@
+"""create contest_change_watermarks table
+
+Revision ID: create_contest_change_watermarks_table
+Revises: create_calendar_sync_tables
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'create_contest_change_watermarks_table'
+down_revision = 'create_calendar_sync_tables'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'contest_change_watermarks',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+def downgrade():
+    op.drop_table('contest_change_watermarks')
@@ -0,0 +1,32 @@
+"""create contest_changes table
+
+Revision ID: create_contest_changes_table
+Revises: create_contests_table
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'create_contest_changes_table'
+down_revision = 'create_contests_table'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'contest_changes',
+        sa.Column('seq', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('contest_id', sa.String(), nullable=False),
+        sa.Column('platform', sa.String(), nullable=False),
+        sa.Column('op', sa.String(), nullable=False),
+        sa.Column('changes', sa.JSON(), nullable=True),
+        sa.Column('changed_at', sa.DateTime(), server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('seq')
+    )
+    op.create_index('ix_contest_changes_changed_at', 'contest_changes', ['changed_at'])
+
+def downgrade():
+    op.drop_index('ix_contest_changes_changed_at', table_name='contest_changes')
+    op.drop_table('contest_changes')
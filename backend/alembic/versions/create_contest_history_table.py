@@ -0,0 +1,44 @@
+"""create contest_history table
+
+Revision ID: create_contest_history_table
+Revises: create_contest_changes_table
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'create_contest_history_table'
+down_revision = 'create_contest_changes_table'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # PostgreSQLでは開始時刻の範囲でパーティション分割する
+    # （年ごとのパーティションはアーカイブ時に ContestArchiver が作成する）
+    op.create_table(
+        'contest_history',
+        sa.Column('platform', sa.String(), nullable=False),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('title', sa.Text(), nullable=False),
+        sa.Column('duration_min', sa.Integer(), nullable=False),
+        sa.Column('url', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('platform', 'id', 'start_time'),
+        postgresql_partition_by='RANGE (start_time)'
+    )
+    op.create_index(
+        'ix_contest_history_platform_start_time',
+        'contest_history',
+        ['platform', 'start_time']
+    )
+    # 未来の開始時刻で絞り込むクエリのために開始時刻のインデックスを作成
+    op.create_index('ix_contests_start_time', 'contests', ['start_time'])
+
+def downgrade():
+    op.drop_index('ix_contests_start_time', table_name='contests')
+    op.drop_index('ix_contest_history_platform_start_time', table_name='contest_history')
+    op.drop_table('contest_history')
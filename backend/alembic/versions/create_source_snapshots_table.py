@@ -0,0 +1,29 @@
+"""create source_snapshots table
+
+Revision ID: create_source_snapshots_table
+Revises: use_composite_contest_key
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'create_source_snapshots_table'
+down_revision = 'use_composite_contest_key'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'source_snapshots',
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('content_hash', sa.String(), nullable=False),
+        sa.Column('contest_count', sa.Integer(), nullable=False),
+        sa.Column('fetched_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('source')
+    )
+
+def downgrade():
+    op.drop_table('source_snapshots')
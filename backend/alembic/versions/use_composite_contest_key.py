@@ -0,0 +1,33 @@
+"""use (platform, id) as the contests primary key
+
+Revision ID: use_composite_contest_key
+Revises: add_contest_title_trgm_index
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'use_composite_contest_key'
+down_revision = 'add_contest_title_trgm_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Codeforces の "1888" のようなIDは他のOJのIDと衝突しうるため、プラットフォームを主キーに含める
+    if op.get_bind().dialect.name == 'sqlite':
+        # SQLiteの主キーには名前がないため、テーブルを作り直して主キーを置き換える
+        with op.batch_alter_table('contests', recreate='always') as batch_op:
+            batch_op.create_primary_key('contests_pkey', ['platform', 'id'])
+        return
+    op.drop_constraint('contests_pkey', 'contests', type_='primary')
+    op.create_primary_key('contests_pkey', 'contests', ['platform', 'id'])
+
+def downgrade():
+    # 同じIDのコンテストが複数のプラットフォームに存在する場合は失敗する
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('contests', recreate='always') as batch_op:
+            batch_op.create_primary_key('contests_pkey', ['id'])
+        return
+    op.drop_constraint('contests_pkey', 'contests', type_='primary')
+    op.create_primary_key('contests_pkey', 'contests', ['id'])
@@ -0,0 +1,65 @@
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Header
+from sqlalchemy.orm import Session
+from app.core import profiling
+from app.core.circuit_breaker import get_breaker
+from app.core.database import get_db
+from app.core.single_flight import update_flight, sync_flight
+from app.models.source_snapshot import SourceSnapshot
+from app.schemas.source import SourceStatus
+from app.services.contest_fetcher import ContestFetcher
+
+router = APIRouter()
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """X-Admin-Token ヘッダが ADMIN_TOKEN と一致するか確認します"""
+    if not profiling.ADMIN_TOKEN or x_admin_token != profiling.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="管理者トークンが正しくありません")
+
+@router.get("/admin/profiles", dependencies=[Depends(require_admin_token)])
+async def list_profiles() -> List[Dict[str, Any]]:
+    """
+    直近に計測したリクエストのプロファイルの概要を新しい順に取得します。
+    """
+    return [profile.summary() for profile in reversed(profiling.profile_store)]
+
+@router.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin_token)])
+async def get_profile(profile_id: str) -> Dict[str, Any]:
+    """
+    プロファイルの詳細（遅いSQL、外部HTTP呼び出し、サンプリングしたスタック）を取得します。
+    """
+    profile = profiling.get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="プロファイルが見つかりません")
+    return profile.detail()
+
+@router.get("/admin/single-flight", dependencies=[Depends(require_admin_token)])
+async def single_flight_stats() -> List[Dict[str, Any]]:
+    """
+    コンテスト情報の更新とカレンダー同期の実行回数、まとめられた呼び出し数などを取得します。
+    """
+    return [update_flight.stats(), sync_flight.stats()]
+
+@router.get("/admin/sources", response_model=List[SourceStatus], dependencies=[Depends(require_admin_token)])
+async def list_source_status(db: Session = Depends(get_db)):
+    """
+    コンテストの取得元ごとのサーキットブレーカーの状態と、
+    最後に正常に取得できたデータ（スナップショット）の情報を取得します。
+    """
+    snapshots = {s.source: s for s in db.query(SourceSnapshot).all()}
+    statuses = []
+    for source in ContestFetcher().sources:
+        breaker = get_breaker(source).status()
+        snapshot = snapshots.get(source)
+        statuses.append({
+            "source": source,
+            "state": breaker["state"],
+            "failures": breaker["failures"],
+            "retry_in_sec": breaker["retry_in_sec"],
+            "last_error": breaker["last_error"],
+            "last_failure_at": breaker["last_failure_at"],
+            "last_success_at": breaker["last_success_at"],
+            "snapshot_fetched_at": snapshot.fetched_at if snapshot else None,
+            "snapshot_contests": snapshot.contest_count if snapshot else None
+        })
+    return statuses
@@ -1,29 +1,63 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Header, Request
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.api.admin import require_admin_token
+from app.core.auth import get_user_id, verify_id_token
+from app.core.broadcaster import broadcaster
+from app.core.single_flight import sync_flight
+from app.core.database import get_db, SessionLocal
 from app.models.contest import Contest
-from app.schemas.contest import Contest as ContestSchema
-from app.services.contest_updater import ContestUpdater
+from app.schemas.contest import Contest as ContestSchema, ContestSearchResult, FreeSlot
+from app.schemas.contest_change import ContestChangeList
+from app.services.contest_change_log import ContestChangeLog
+from app.services.contest_exporter import ContestExporter, EXPORT_FORMATS
+from app.services.contest_search import ContestSearch
+from app.services.interval_index import interval_index
+from app.services.contest_updater import run_contest_update
 from app.services.calendar_sync import CalendarSyncService
+from app.services.user_settings import user_settings
 from app.core.logger import logger
+from app.core.timeutil import to_naive_utc
+import asyncio
+import hashlib
 import json
+from datetime import datetime, timedelta
 
 router = APIRouter()
 
+# SSE接続を維持するためのハートビート間隔（秒）
+SSE_HEARTBEAT_SEC = 15
+
+def _format_sse(message: dict) -> str:
+    """メッセージをServer-Sent Events形式に変換"""
+    lines = []
+    if message.get("latest_seq") is not None:
+        lines.append(f"id: {message['latest_seq']}")
+    lines.append(f"event: {message['type']}")
+    lines.append(f"data: {json.dumps(message, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
 @router.get("/contests", response_model=List[ContestSchema])
 async def list_contests(
     platform: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user_id: Optional[str] = Depends(get_user_id)
 ):
     """
     指定されたプラットフォームの今後のコンテスト一覧を取得します。
     プラットフォームが指定されていない場合は、すべてのコンテストを返します。
+    ユーザーが設定で無効にしたプラットフォームのコンテストは含みません。
     """
     query = db.query(Contest)
     
     if platform:
         query = query.filter(Contest.platform == platform)
+
+    platform_filter = user_settings.get(db, user_id).platform_filter(Contest.platform)
+    if platform_filter is not None:
+        query = query.filter(platform_filter)
     
     # 開始時間が現在以降のコンテストのみを取得
     from datetime import datetime
@@ -34,21 +68,199 @@ async def list_contests(
     
     return contests
 
+@router.get("/contests/export")
+async def export_contests(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|msgpack)$"),
+    scope: str = Query("all", pattern="^(upcoming|past|all)$"),
+    platform: Optional[List[str]] = Query(None)
+):
+    """
+    コンテストを NDJSON / CSV / msgpack（列指向のバッチ）形式でストリーミング出力します。
+    `scope` が past または all の場合はアーカイブ済みのコンテストも含みます。
+    """
+    exporter = ContestExporter(scope, platform)
+    extension = "msgpack" if format == "msgpack" else format
+    return StreamingResponse(
+        exporter.stream(format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f"attachment; filename=contests.{extension}"}
+    )
+
+@router.get("/contests/search", response_model=List[ContestSearchResult])
+async def search_contests(
+    q: str = Query(..., min_length=1, max_length=200),
+    platform: Optional[List[str]] = Query(None),
+    scope: str = Query("upcoming", pattern="^(upcoming|past|all)$"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    コンテスト名でコンテストを検索し、関連度の高い順に返します。
+    `scope` は upcoming（今後）/ past（過去、アーカイブを含む）/ all のいずれかです。
+    """
+    return ContestSearch(db).search(q, platform, scope, limit)
+
+@router.get("/contests/conflicts", response_model=List[ContestSchema])
+async def list_contest_conflicts(
+    contest_id: Optional[str] = None,
+    contest_platform: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    platform: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    指定したコンテスト（`contest_id` と `contest_platform`）または期間（`start` と `end`）と
+    開催時間が重なる今後のコンテストを取得します。
+    """
+    if contest_id:
+        # コンテストIDはプラットフォームをまたいで重複しうるため、プラットフォームも必須とする
+        if not contest_platform:
+            raise HTTPException(status_code=400, detail="contest_id を指定する場合は contest_platform も指定してください")
+        target = db.query(Contest).filter(
+            Contest.platform == contest_platform,
+            Contest.id == contest_id
+        ).first()
+        if not target:
+            raise HTTPException(status_code=404, detail="コンテストが見つかりません")
+        start = target.start_time
+        end = start + timedelta(minutes=max(target.duration_min, 1))
+    elif start and end:
+        start, end = to_naive_utc(start), to_naive_utc(end)
+        if start >= end:
+            raise HTTPException(status_code=400, detail="end は start より後の日時を指定してください")
+    else:
+        raise HTTPException(status_code=400, detail="contest_id または start と end を指定してください")
+
+    conflicts = interval_index.get(db).conflicts(start, end, platform)
+    if contest_id:
+        conflicts = [
+            c for c in conflicts
+            if not (c["id"] == target.id and c["platform"] == target.platform)
+        ]
+    return conflicts
+
+@router.get("/contests/free-slots", response_model=List[FreeSlot])
+async def list_free_slots(
+    start: datetime,
+    end: datetime,
+    min_duration_min: int = Query(0, ge=0),
+    platform: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    指定した期間のうち、コンテストが開催されていない空き時間帯を取得します。
+    `platform` を指定すると、そのプラットフォームのコンテストのみを考慮します。
+    """
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="end は start より後の日時を指定してください")
+
+    slots = interval_index.get(db).free_slots(start, end, min_duration_min, platform)
+    return [
+        {"start": s, "end": e, "duration_min": int((e - s).total_seconds() // 60)}
+        for s, e in slots
+    ]
+
+@router.get("/contests/changes", response_model=ContestChangeList)
+async def list_contest_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    platform: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    指定したシーケンス番号より後のコンテストの変更（追加・更新・削除）を取得します。
+    `reset` がTrueの場合はログが圧縮済みのため、`/contests` から全件を再取得してください。
+    """
+    changes, latest_seq, has_more, reset = ContestChangeLog(db).list_since(since, limit, platform)
+    return {
+        "changes": changes,
+        "latest_seq": latest_seq,
+        "has_more": has_more,
+        "reset": reset
+    }
+
+@router.get("/contests/stream")
+async def stream_contest_changes(
+    request: Request,
+    platform: Optional[List[str]] = Query(None),
+    last_event_id: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    コンテストの変更通知をServer-Sent Eventsで配信します。
+    `platform` を複数指定すると、そのプラットフォームの変更のみを受け取ります。
+    再接続時は `Last-Event-ID` 以降の変更をチェンジログから再送します。
+    """
+    # 切断中に発生した変更を再送（ストリーム開始前にDBアクセスを済ませる）
+    replay = None
+    if last_event_id and last_event_id.isdigit():
+        changes, latest_seq, has_more, reset = ContestChangeLog(db).list_since(int(last_event_id), 500)
+        missed = [
+            {"seq": c.seq, "op": c.op, "platform": c.platform, "contest_id": c.contest_id}
+            for c in changes if not platform or c.platform in platform
+        ]
+        if has_more or reset:
+            replay = {"type": "resync"}
+        elif missed:
+            replay = {"type": "contests", "latest_seq": latest_seq, "changes": missed}
+
+    try:
+        subscription = broadcaster.subscribe(platform)
+    except RuntimeError:
+        raise HTTPException(status_code=503, detail="接続数が上限に達しています")
+    if replay:
+        subscription.offer(replay)
+
+    async def event_stream():
+        try:
+            yield f"retry: {SSE_HEARTBEAT_SEC * 1000}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout=SSE_HEARTBEAT_SEC)
+                    yield _format_sse(message)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/admin/update-contests")
-async def admin_update_contests(db: Session = Depends(get_db)):
+async def admin_update_contests(
+    force: bool = Query(False),
+    x_admin_token: Optional[str] = Header(None)
+):
     """
     コンテスト情報を手動で更新します。
     外部APIからコンテスト情報を取得し、データベースを更新します。
+    実行中の更新がある場合は新たに実行せず、その結果を返します。
+    最小実行間隔内の前回の結果を再利用した場合は reused、実行中の更新にまとめた場合は coalesced が true になります。
+    force=true（X-Admin-Token が必要）を指定すると、最小実行間隔内でも更新します。
     """
+    if force:
+        require_admin_token(x_admin_token)
     try:
-        updater = ContestUpdater(db)
-        updated, skipped = await updater.update_contests()
-        return {
+        updated, skipped, archive_error, flight = await run_contest_update(force=force)
+        result = {
             "success": True,
-            "message": "コンテスト情報を更新しました",
+            "message": "コンテスト情報を更新しました" if not flight["reused"] else "直前の更新結果を返しました",
             "updated": updated,
-            "skipped": skipped
+            "skipped": skipped,
+            "reused": flight["reused"],
+            "coalesced": flight["coalesced"],
+            "finished_at": flight["finished_at"]
         }
+        if archive_error:
+            result["archive_error"] = archive_error
+        return result
     except Exception as e:
         return {
             "success": False,
@@ -58,7 +270,6 @@ async def admin_update_contests(db: Session = Depends(get_db)):
 @router.post("/sync/calendar")
 async def sync_calendar(
     request: Request,
-    db: Session = Depends(get_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -91,18 +302,34 @@ async def sync_calendar(
             # ボディがJSONでない場合は無視
             logger.warning("Request body is not valid JSON")
         
-        # カレンダー同期サービスを初期化
-        sync_service = CalendarSyncService(
-            db, 
-            access_token=access_token,
-            refresh_token=refresh_token,
-            id_token=id_token
+        # 設定APIと同じく、検証済みのIDトークンの sub をユーザーIDとして使う
+        user_id = await run_in_threadpool(verify_id_token, id_token)
+        # 検証できない場合はデフォルト設定で同期し、同時リクエストのまとめはアクセストークン単位で行う
+        flight_key = user_id or "token:" + hashlib.sha256((access_token or "").encode("utf-8")).hexdigest()
+
+        async def sync():
+            # 呼び出し元のリクエストが先に終了しても使えるよう、実行ごとにセッションを作る
+            sync_db = SessionLocal()
+            try:
+                # カレンダー同期サービスを初期化
+                sync_service = CalendarSyncService(
+                    sync_db,
+                    access_token=access_token,
+                    refresh_token=refresh_token,
+                    id_token=id_token,
+                    settings=user_settings.get(sync_db, user_id),
+                    user_id=user_id
+                )
+
+                # 同期を実行
+                return await sync_service.sync_contests_to_calendar()
+            finally:
+                sync_db.close()
+
+        # 同じユーザーの同時リクエスト（二重クリックなど）は1回の同期にまとめる
+        return await sync_flight.run(
+            flight_key, sync, reusable=lambda result: result.get("success", False)
         )
-        
-        # 同期を実行
-        result = await sync_service.sync_contests_to_calendar()
-        
-        return result
     except Exception as e:
         logger.error(f"Error in sync_calendar endpoint: {str(e)}")
         return {
@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from app.core.database import get_db
+from app.models.contest_history import ContestHistory
+from app.schemas.contest_history import ContestHistory as ContestHistorySchema, MonthlyContestCount
+
+router = APIRouter()
+
+def _month_expr(db: Session):
+    """開始時刻を YYYY-MM 形式の月に変換するSQL式"""
+    if db.bind.dialect.name == "postgresql":
+        return func.to_char(func.date_trunc("month", ContestHistory.start_time), "YYYY-MM")
+    return func.strftime("%Y-%m", ContestHistory.start_time)
+
+def _filter_history(query, platform: Optional[str], start: Optional[datetime], end: Optional[datetime]):
+    # 開始時刻で絞り込むことで対象のパーティションのみが走査される
+    if platform:
+        query = query.filter(ContestHistory.platform == platform)
+    if start:
+        query = query.filter(ContestHistory.start_time >= start)
+    if end:
+        query = query.filter(ContestHistory.start_time < end)
+    return query
+
+@router.get("/contests/history", response_model=List[ContestHistorySchema])
+async def list_contest_history(
+    platform: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    アーカイブ済みの過去のコンテスト一覧を新しい順に取得します。
+    """
+    query = _filter_history(db.query(ContestHistory), platform, start, end)
+    return query.order_by(ContestHistory.start_time.desc()).offset(offset).limit(limit).all()
+
+@router.get("/contests/history/stats", response_model=List[MonthlyContestCount])
+async def contest_history_stats(
+    platform: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    アーカイブ済みコンテストのプラットフォーム別・月別の開催数を取得します。
+    """
+    month = _month_expr(db).label("month")
+    query = _filter_history(
+        db.query(ContestHistory.platform, month, func.count().label("count")),
+        platform, start, end
+    )
+    rows = query.group_by(ContestHistory.platform, month).order_by(month, ContestHistory.platform).all()
+    return [
+        {"platform": row.platform, "month": row.month, "count": row.count}
+        for row in rows
+    ]
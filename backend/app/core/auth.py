@@ -0,0 +1,100 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+import httplib2
+from fastapi import Header, HTTPException
+from google.auth.exceptions import GoogleAuthError
+from google.oauth2 import id_token as google_id_token
+from google_auth_httplib2 import Request as GoogleAuthRequest
+from app.core.logger import logger
+
+# 以前のクライアント向けに、検証できないリクエストの設定を共有の "anonymous" ユーザーとして読み書きするか
+# （IDトークンを送るクライアントへ移行するまでの互換用。有効にすると誰でも共有の設定を変更できる）
+ALLOW_ANONYMOUS_SETTINGS = os.environ.get("SETTINGS_ALLOW_ANONYMOUS", "false").lower() == "true"
+ANONYMOUS_USER_ID = "anonymous"
+
+# 検証済みのIDトークンをキャッシュする件数の上限
+VERIFIED_TOKEN_CACHE_SIZE = int(os.environ.get("VERIFIED_TOKEN_CACHE_SIZE", "10000"))
+
+# トークンのハッシュ → (ユーザーID, 有効期限のUNIX秒)
+_verified_tokens: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_lock = threading.Lock()
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def cached_user_id(token: Optional[str]) -> Optional[str]:
+    """
+    検証済みのキャッシュにあるトークンのユーザーIDを返します（外部への通信は行いません）。
+    """
+    if not token:
+        return None
+    key = _token_key(token)
+    with _lock:
+        entry = _verified_tokens.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del _verified_tokens[key]
+            return None
+        _verified_tokens.move_to_end(key)
+        return entry[0]
+
+def verify_id_token(token: Optional[str]) -> Optional[str]:
+    """
+    GoogleのIDトークンの署名・発行者・有効期限・audience（GOOGLE_CLIENT_ID）を検証し、
+    sub クレームをユーザーIDとして返します。検証できない場合は None を返します。
+    """
+    # JWT形式でないトークン（アクセストークンなど）は検証しない
+    if not token or token.count(".") != 2:
+        return None
+    user_id = cached_user_id(token)
+    if user_id:
+        return user_id
+
+    client_id = os.environ.get("GOOGLE_CLIENT_ID")
+    if not client_id:
+        logger.warning("GOOGLE_CLIENT_ID is not set, cannot verify ID tokens")
+        return None
+    try:
+        claims = google_id_token.verify_oauth2_token(token, GoogleAuthRequest(httplib2.Http()), audience=client_id)
+    except (ValueError, GoogleAuthError) as e:
+        logger.warning(f"Rejected ID token: {str(e)}")
+        return None
+
+    user_id = str(claims["sub"])
+    with _lock:
+        _verified_tokens[_token_key(token)] = (user_id, float(claims["exp"]))
+        while len(_verified_tokens) > VERIFIED_TOKEN_CACHE_SIZE:
+            _verified_tokens.popitem(last=False)
+    return user_id
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if authorization and authorization.startswith("Bearer "):
+        return authorization.split(" ", 1)[1]
+    return None
+
+def get_user_id(authorization: Optional[str] = Header(None)) -> Optional[str]:
+    """
+    Authorization ヘッダのBearerトークン（GoogleのIDトークン）を検証してユーザーIDを取得する依存関係。
+    認証情報がない場合や検証できない場合は None（デフォルト設定を使う未認証のユーザー）。
+    SETTINGS_ALLOW_ANONYMOUS が有効な場合は共有の "anonymous" ユーザー。
+    """
+    user_id = verify_id_token(bearer_token(authorization))
+    if user_id is None and ALLOW_ANONYMOUS_SETTINGS:
+        return ANONYMOUS_USER_ID
+    return user_id
+
+def require_user_id(authorization: Optional[str] = Header(None)) -> str:
+    """検証済みのユーザーIDが必要なAPI用の依存関係（検証できない場合は 401）"""
+    user_id = get_user_id(authorization)
+    if user_id is None:
+        raise HTTPException(
+            status_code=401,
+            detail="認証が必要です",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user_id
@@ -0,0 +1,85 @@
+import asyncio
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set
+from app.core.logger import logger
+
+# 1クライアントあたりのキューの長さと、同時接続数の上限
+SUBSCRIBER_QUEUE_SIZE = int(os.environ.get("BROADCAST_QUEUE_SIZE", "16"))
+MAX_SUBSCRIBERS = int(os.environ.get("BROADCAST_MAX_SUBSCRIBERS", "5000"))
+
+class Subscription:
+    """1クライアント分の購読情報"""
+
+    def __init__(self, platforms: Optional[Set[str]]):
+        self.platforms = platforms
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def wants(self, platform: str) -> bool:
+        return self.platforms is None or platform in self.platforms
+
+    def offer(self, message: Dict[str, Any]) -> bool:
+        """
+        メッセージをキューに積みます。
+        キューが溢れた遅いクライアントには未送信分を破棄して再同期を促します。
+        戻り値: キューが溢れたかどうか
+        """
+        try:
+            self.queue.put_nowait(message)
+            return False
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync"})
+            return True
+
+class ContestBroadcaster:
+    """
+    コンテストの変更通知をプロセス内の購読者に配信するブロードキャスター
+    """
+
+    def __init__(self):
+        self.subscribers: Set[Subscription] = set()
+
+    def subscribe(self, platforms: Optional[Iterable[str]] = None) -> Subscription:
+        if len(self.subscribers) >= MAX_SUBSCRIBERS:
+            raise RuntimeError("Too many subscribers")
+        subscription = Subscription(set(platforms) if platforms else None)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscribers.discard(subscription)
+
+    def publish(self, changes: List[Dict[str, Any]]) -> None:
+        """
+        変更通知を購読者ごとにプラットフォームで絞り込んで配信します。
+        イベントループ上から呼び出す必要があります。
+        """
+        if not changes or not self.subscribers:
+            return
+
+        overflowed = 0
+        for subscription in list(self.subscribers):
+            matched = [change for change in changes if subscription.wants(change["platform"])]
+            if not matched:
+                continue
+            if subscription.offer({
+                "type": "contests",
+                "latest_seq": matched[-1]["seq"],
+                "changes": matched
+            }):
+                overflowed += 1
+
+        logger.info(f"Broadcasted {len(changes)} contest changes to {len(self.subscribers)} subscribers")
+        if overflowed:
+            logger.warning(f"{overflowed} slow subscribers were asked to resync")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self.subscribers),
+            "max_subscribers": MAX_SUBSCRIBERS,
+            "queue_size": SUBSCRIBER_QUEUE_SIZE
+        }
+
+# プロセス内で共有するブロードキャスター
+broadcaster = ContestBroadcaster()
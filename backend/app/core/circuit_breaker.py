@@ -0,0 +1,91 @@
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from app.core.logger import logger
+
+# 連続で何回失敗したら遮断するか、遮断後に何秒で再試行するか
+FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "3"))
+RECOVERY_TIMEOUT_SEC = int(os.environ.get("CIRCUIT_RECOVERY_TIMEOUT_SEC", "300"))
+
+class CircuitBreaker:
+    """
+    外部APIの障害時にリクエストを即座に失敗させるサーキットブレーカー
+    closed（通常）→ open（遮断中）→ half_open（試行中）の状態を持ちます
+    """
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD, recovery_timeout: int = RECOVERY_TIMEOUT_SEC):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_failure_at: Optional[datetime] = None
+        self.last_success_at: Optional[datetime] = None
+        # half_open 中に送った試行リクエストの開始時刻（結果が出るまで他のリクエストは遮断する）
+        self.probe_started_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        """リクエストを送ってよいかを返します"""
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self.opened_at < self.recovery_timeout:
+                return False
+            # 一定時間経過したら1回だけ試行する
+            self.state = "half_open"
+            logger.info(f"Circuit breaker for {self.name} is half-open")
+        if self.state == "half_open":
+            # 試行中のリクエストがあれば結果が出るまで即座に失敗させる
+            # （キャンセルなどで結果が記録されなかった場合に備え、一定時間後は再試行を許可する）
+            if self.probe_started_at is not None and now - self.probe_started_at < self.recovery_timeout:
+                return False
+            self.probe_started_at = now
+        return True
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info(f"Circuit breaker for {self.name} is closed")
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+        self.last_success_at = datetime.now(timezone.utc)
+
+    def record_failure(self, error: Exception) -> None:
+        self.failures += 1
+        self.last_error = str(error)
+        self.last_failure_at = datetime.now(timezone.utc)
+        self.probe_started_at = None
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Circuit breaker for {self.name} is open after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def status(self) -> Dict[str, Any]:
+        """監視用に現在の状態を返します"""
+        retry_in = None
+        if self.state == "open":
+            retry_in = max(0, int(self.recovery_timeout - (time.monotonic() - self.opened_at)))
+        return {
+            "name": self.name,
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in_sec": retry_in,
+            "last_error": self.last_error,
+            "last_failure_at": self.last_failure_at,
+            "last_success_at": self.last_success_at
+        }
+
+# 取得元ごとのサーキットブレーカー
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(name: str) -> CircuitBreaker:
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+def all_breakers() -> Dict[str, CircuitBreaker]:
+    return dict(_breakers)
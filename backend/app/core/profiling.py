@@ -0,0 +1,226 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.logger import logger
+from app.core.rate_limit import find_policy
+
+# プロファイリングを許可するか（許可されていても X-Profile ヘッダがあるリクエストのみ計測する）
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+# サンプリング間隔（秒）と保持するプロファイル数
+SAMPLE_INTERVAL_SEC = float(os.environ.get("PROFILING_SAMPLE_INTERVAL_SEC", "0.005"))
+PROFILE_HISTORY = int(os.environ.get("PROFILING_HISTORY", "20"))
+MAX_STACK_DEPTH = 40
+
+class RequestProfile:
+    """1リクエスト分のプロファイル結果"""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now(timezone.utc)
+        self.duration_ms = 0.0
+        self.status_code: Optional[int] = None
+        self.sql: List[Dict[str, Any]] = []
+        self.http: List[Dict[str, Any]] = []
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+
+    def add_sql(self, statement: str, duration_ms: float) -> None:
+        self.sql.append({"statement": statement, "duration_ms": round(duration_ms, 3)})
+
+    def add_http(self, method: str, url: str, status_code: Optional[int], duration_ms: float) -> None:
+        self.http.append({
+            "method": method,
+            "url": url,
+            "status_code": status_code,
+            "duration_ms": round(duration_ms, 3)
+        })
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "status_code": self.status_code,
+            "sql_count": len(self.sql),
+            "sql_total_ms": round(sum(q["duration_ms"] for q in self.sql), 3),
+            "http_count": len(self.http),
+            "http_total_ms": round(sum(h["duration_ms"] for h in self.http), 3),
+            "sample_count": self.sample_count
+        }
+
+    def detail(self, top: int = 20) -> Dict[str, Any]:
+        result = self.summary()
+        result["slowest_sql"] = sorted(self.sql, key=lambda q: q["duration_ms"], reverse=True)[:top]
+        result["http_calls"] = self.http
+        # 折りたたみ形式（root;...;leaf）のスタックとサンプル数。フレームグラフの入力に使える
+        result["stacks"] = [
+            {"stack": stack, "samples": count}
+            for stack, count in self.samples.most_common(top * 5)
+        ]
+        return result
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+# 直近のプロファイル結果（新しいものが後ろ）
+profile_store: Deque[RequestProfile] = deque(maxlen=PROFILE_HISTORY)
+
+def get_profile(profile_id: str) -> Optional[RequestProfile]:
+    return next((p for p in profile_store if p.id == profile_id), None)
+
+class _StackSampler(threading.Thread):
+    """
+    イベントループのスレッドのスタックを一定間隔で記録するサンプリングプロファイラ。
+    同じループでは他のリクエストのコルーチンも実行されるため、計測対象のリクエストの
+    フレーム（root_frame）を含むスタックのみを記録し、root_frame より外側は記録しません。
+    """
+
+    def __init__(self, thread_id: int, root_frame, profile: RequestProfile):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.root_frame = root_frame
+        self.profile = profile
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(SAMPLE_INTERVAL_SEC):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.root_frame:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if frame is None:
+                # 他のタスクの実行中、またはループが待機中
+                continue
+            self.profile.samples[";".join(reversed(stack[-MAX_STACK_DEPTH:]))] += 1
+            self.profile.sample_count += 1
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join()
+
+def _is_profiling_requested(headers: List) -> bool:
+    values = {}
+    for key, value in headers:
+        if key in (b"x-profile", b"x-admin-token"):
+            values[key] = value.decode("latin-1")
+    return (
+        values.get(b"x-profile") == "1"
+        and ADMIN_TOKEN is not None
+        and values.get(b"x-admin-token") == ADMIN_TOKEN
+    )
+
+class ProfilingMiddleware:
+    """
+    X-Profile: 1 と正しい X-Admin-Token が指定されたリクエストのみ、
+    サンプリングプロファイル・SQL・外部HTTP呼び出しを計測するASGIミドルウェア
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not PROFILING_ENABLED or scope["type"] != "http" or not _is_profiling_requested(scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+        # 長時間接続するストリーミングのAPIは、接続している間サンプリングが続くため計測しない
+        policy = find_policy(scope["path"])
+        if policy is not None and policy.streaming:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = _current_profile.set(profile)
+        # このコルーチンのフレームを含むスタックのみ、このリクエストの処理として記録する
+        sampler = _StackSampler(threading.get_ident(), sys._getframe(), profile)
+        sampler.start()
+        started = time.perf_counter()
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile.id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            profile.duration_ms = (time.perf_counter() - started) * 1000
+            _current_profile.reset(token)
+            profile_store.append(profile)
+            logger.info(f"Profiled {profile.method} {profile.path} as {profile.id} ({profile.duration_ms:.1f} ms)")
+
+def install_sql_profiling(engine: Engine) -> None:
+    """SQLAlchemyのエンジンにクエリの計測用のイベントリスナーを登録します"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_profile.get() is not None:
+            conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = _current_profile.get()
+        starts = conn.info.get("profile_query_start")
+        if profile is not None and starts:
+            profile.add_sql(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+async def _on_httpx_request(request) -> None:
+    if _current_profile.get() is not None:
+        request.extensions["profile_start"] = time.perf_counter()
+
+async def _on_httpx_response(response) -> None:
+    profile = _current_profile.get()
+    start = response.request.extensions.get("profile_start")
+    if profile is not None and start is not None:
+        profile.add_http(
+            response.request.method,
+            str(response.request.url),
+            response.status_code,
+            (time.perf_counter() - start) * 1000
+        )
+
+def httpx_event_hooks() -> Dict[str, List]:
+    """httpx.AsyncClient に渡す外部HTTP呼び出しの計測用フック"""
+    return {"request": [_on_httpx_request], "response": [_on_httpx_response]}
+
+class ProfiledHttp:
+    """
+    Google API クライアントが使う httplib2 互換のHTTPオブジェクトをラップし、
+    プロファイリング中のリクエストの外部HTTP呼び出しを記録します
+    """
+
+    def __init__(self, http):
+        self._http = http
+
+    def request(self, uri, method="GET", *args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return self._http.request(uri, method, *args, **kwargs)
+        start = time.perf_counter()
+        status = None
+        try:
+            response, content = self._http.request(uri, method, *args, **kwargs)
+            status = response.status
+            return response, content
+        finally:
+            profile.add_http(method, uri, status, (time.perf_counter() - start) * 1000)
+
+    def __getattr__(self, name):
+        return getattr(self._http, name)
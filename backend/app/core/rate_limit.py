@@ -0,0 +1,261 @@
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.core.auth import bearer_token, cached_user_id
+from app.core.database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# 共有ストア（複数プロセスでトークンバケットを共有する場合のみ設定）
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL")
+# リバースプロキシ配下で X-Forwarded-For を信頼するか
+TRUST_FORWARDED_FOR = os.environ.get("RATE_LIMIT_TRUST_FORWARDED_FOR", "false").lower() == "true"
+# 処理中のリクエスト数と読み取りAPIの平均レイテンシがこれを超えたら負荷の高いAPIを遮断する
+SHED_MAX_INFLIGHT = int(os.environ.get("RATE_LIMIT_SHED_MAX_INFLIGHT", "200"))
+SHED_LATENCY_MS = float(os.environ.get("RATE_LIMIT_SHED_LATENCY_MS", "500"))
+# 読み取りAPIのレイテンシの平均が半減するまでの秒数（リクエストがなくても時間とともに減衰させる）
+SHED_LATENCY_HALF_LIFE_SEC = float(os.environ.get("RATE_LIMIT_SHED_LATENCY_HALF_LIFE_SEC", "10"))
+# プロセス内に保持するトークンバケット数の上限（超えた場合は最も長く使われていないものから削除）
+MAX_BUCKETS = int(os.environ.get("RATE_LIMIT_MAX_BUCKETS", "10000"))
+
+class RoutePolicy:
+    """パスの接頭辞ごとの流量制限"""
+
+    def __init__(
+        self,
+        prefix: str,
+        rate: float,
+        burst: int,
+        max_concurrency: Optional[int] = None,
+        max_queue: int = 0,
+        queue_timeout_sec: float = 1.0,
+        expensive: bool = False,
+        streaming: bool = False
+    ):
+        self.prefix = prefix
+        self.rate = rate  # 1秒あたりに補充されるトークン数
+        self.burst = burst  # バケットの容量
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_sec = queue_timeout_sec
+        # 過負荷時に優先して遮断する（外部APIの呼び出しや大量の書き込みを伴う）
+        self.expensive = expensive
+        # 長時間接続するため処理中のリクエスト数とレイテンシの計測から除外する
+        self.streaming = streaming
+
+# 先頭から順に一致を確認するため、より具体的な接頭辞を先に書く
+ROUTE_POLICIES: List[RoutePolicy] = [
+    RoutePolicy("/api/admin/update-contests", rate=1 / 60, burst=2, max_concurrency=1, expensive=True),
+    RoutePolicy("/api/sync/calendar", rate=1 / 30, burst=3, max_concurrency=4, max_queue=4, expensive=True),
+    RoutePolicy("/api/contests/export", rate=1 / 10, burst=3, max_concurrency=2, expensive=True, streaming=True),
+    RoutePolicy("/api/contests/stream", rate=0.5, burst=5, streaming=True),
+    RoutePolicy("/api/admin/", rate=1, burst=10, max_concurrency=4),
+]
+# 読み取り以外で同時に使われうるDB接続数（上記のルートの同時実行数の合計と、スケジューラーの更新ジョブ1つ分）
+RESERVED_DB_CONNECTIONS = sum(p.max_concurrency or 0 for p in ROUTE_POLICIES) + 1
+# エンドポイントはイベントループ上で同期的にDBへ接続するため、接続プールが空くのを待つと全体が停止する。
+# その他のAPIの同時実行数は、予約分を除いた接続プールの残りに収め、超えた分は待ち行列で待たせる
+READ_MAX_CONCURRENCY = int(
+    os.environ.get("RATE_LIMIT_READ_MAX_CONCURRENCY")
+    or max(1, DB_POOL_SIZE + DB_MAX_OVERFLOW - RESERVED_DB_CONNECTIONS)
+)
+ROUTE_POLICIES.append(RoutePolicy("/api/", rate=10, burst=40, max_concurrency=READ_MAX_CONCURRENCY, max_queue=64))
+
+def find_policy(path: str) -> Optional[RoutePolicy]:
+    return next((p for p in ROUTE_POLICIES if path.startswith(p.prefix)), None)
+
+class InMemoryTokenBucketStore:
+    """プロセス内のトークンバケット（使われた順に並べ、上限を超えたら古いものから削除する）"""
+
+    def __init__(self, max_buckets: int = MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self.buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        """
+        トークンを1つ消費します。
+        戻り値: (許可されたか, 次にトークンが補充されるまでの秒数)
+        """
+        now = time.monotonic()
+        tokens, updated = self.buckets.get(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        self.buckets[key] = (tokens - 1 if allowed else tokens, now)
+        self.buckets.move_to_end(key)
+        while len(self.buckets) > self.max_buckets:
+            self.buckets.popitem(last=False)
+        if allowed:
+            return True, 0.0
+        return False, (1 - tokens) / rate
+
+class RedisTokenBucketStore:
+    """複数プロセスで共有するRedis上のトークンバケット"""
+
+    SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or ARGV[2])
+local updated = tonumber(redis.call('HGET', KEYS[1], 'updated') or ARGV[3])
+tokens = math.min(tonumber(ARGV[2]), tokens + (tonumber(ARGV[3]) - updated) * tonumber(ARGV[1]))
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', ARGV[3])
+redis.call('EXPIRE', KEYS[1], 3600)
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        allowed, tokens = await self.script(keys=[f"rate_limit:{key}"], args=[rate, burst, time.time()])
+        if allowed:
+            return True, 0.0
+        return False, (1 - float(tokens)) / rate
+
+def _create_store():
+    if RATE_LIMIT_REDIS_URL:
+        try:
+            return RedisTokenBucketStore(RATE_LIMIT_REDIS_URL)
+        except ImportError as e:
+            # プロセスごとの制限に黙って切り替わると、想定の数倍のリクエストを許可してしまう
+            raise RuntimeError(
+                "RATE_LIMIT_REDIS_URL is set but the redis package is not installed "
+                "(pip install -r requirements-redis.txt)"
+            ) from e
+    return InMemoryTokenBucketStore()
+
+class _ConcurrencyLimiter:
+    """ルートごとの同時実行数の制限と待ち行列"""
+
+    def __init__(self, limit: int, max_queue: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.max_queue = max_queue
+        self.waiting = 0
+
+    async def acquire(self, timeout: float) -> bool:
+        if not self.semaphore.locked():
+            await self.semaphore.acquire()
+            return True
+        if self.waiting >= self.max_queue:
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+
+    def release(self) -> None:
+        self.semaphore.release()
+
+def _client_key(scope) -> str:
+    """
+    クライアントの識別子（検証済みのユーザー、なければIPアドレス）。
+    未検証のトークンで区別するとランダムなトークンで制限を回避できるため、キャッシュ済みの検証結果のみを使う。
+    """
+    headers = dict(scope["headers"])
+    authorization = headers.get(b"authorization")
+    user_id = cached_user_id(bearer_token(authorization.decode("latin-1"))) if authorization else None
+    if user_id:
+        return "user:" + user_id
+    if TRUST_FORWARDED_FOR and b"x-forwarded-for" in headers:
+        return "ip:" + headers[b"x-forwarded-for"].decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+class RateLimitMiddleware:
+    """
+    クライアントごとのトークンバケット、ルートごとの同時実行数制限、
+    過負荷時の負荷遮断を行い、制限時は 429 と Retry-After を返すASGIミドルウェア
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.store = _create_store()
+        self.limiters: Dict[str, _ConcurrencyLimiter] = {}
+        self.inflight = 0
+        # 読み取りAPIのレイテンシの指数移動平均（ミリ秒）と、最後に更新した時刻
+        self._read_latency_ms = 0.0
+        self._read_latency_at = time.monotonic()
+        self.shed_count = 0
+
+    async def __call__(self, scope, receive, send):
+        if not RATE_LIMIT_ENABLED or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        policy = find_policy(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        # 過負荷時は負荷の高いAPIから遮断し、読み取りAPIのレイテンシを守る
+        overloaded = self.inflight >= SHED_MAX_INFLIGHT or self.read_latency_ms() >= SHED_LATENCY_MS
+        if (policy.expensive and overloaded) or self.inflight >= SHED_MAX_INFLIGHT * 2:
+            await self._reject(send, "サーバーが混雑しています", 5)
+            return
+
+        allowed, retry_after = await self.store.take(f"{policy.prefix}|{_client_key(scope)}", policy.rate, policy.burst)
+        if not allowed:
+            await self._reject(send, "リクエストが多すぎます", retry_after)
+            return
+
+        limiter = None
+        if policy.max_concurrency:
+            limiter = self.limiters.setdefault(
+                policy.prefix, _ConcurrencyLimiter(policy.max_concurrency, policy.max_queue)
+            )
+            if not await limiter.acquire(policy.queue_timeout_sec):
+                await self._reject(send, "同時実行数の上限に達しています", 1)
+                return
+
+        if policy.streaming:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                if limiter:
+                    limiter.release()
+            return
+
+        self.inflight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.inflight -= 1
+            if limiter:
+                limiter.release()
+            if not policy.expensive:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self._read_latency_ms = self.read_latency_ms() * 0.9 + elapsed_ms * 0.1
+                self._read_latency_at = time.monotonic()
+
+    def read_latency_ms(self) -> float:
+        """
+        読み取りAPIの平均レイテンシ（ミリ秒）。
+        リクエストが少ないときに1件の遅い応答で遮断が続かないよう、最後の更新からの経過時間で減衰させる。
+        """
+        elapsed = time.monotonic() - self._read_latency_at
+        return self._read_latency_ms * 0.5 ** (elapsed / SHED_LATENCY_HALF_LIFE_SEC)
+
+    async def _reject(self, send, message: str, retry_after: float) -> None:
+        self.shed_count += 1
+        body = json.dumps({"detail": message}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode("latin-1")),
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -2,9 +2,7 @@ import asyncio
 from datetime import datetime, timezone
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
-from app.services.contest_updater import ContestUpdater
+from app.services.contest_updater import run_contest_update
 from app.core.logger import logger
 
 class ContestScheduler:
@@ -20,15 +18,18 @@ class ContestScheduler:
     async def update_contests(self):
         """コンテストデータを更新するジョブ"""
         logger.info("Starting scheduled contest update")
-        db = SessionLocal()
         try:
-            updater = ContestUpdater(db)
-            updated, skipped = await updater.update_contests()
+            # 手動更新と重なった場合はその結果を共有する
+            updated, skipped, archive_error, flight = await run_contest_update()
+            if archive_error:
+                logger.error("Scheduled archival failed", extra={"error": archive_error})
             logger.info(
                 "Scheduled update completed",
                 extra={
                     "updated": updated,
                     "skipped": skipped,
+                    "reused": flight["reused"],
+                    "coalesced": flight["coalesced"],
                     "timestamp": datetime.now(timezone.utc).isoformat()
                 }
             )
@@ -37,8 +38,6 @@ class ContestScheduler:
                 "Scheduled update failed",
                 extra={"error": str(e)}
             )
-        finally:
-            db.close()
 
     def start(self):
         """スケジューラーを開始"""
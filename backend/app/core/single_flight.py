@@ -0,0 +1,123 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.core.logger import logger
+
+# 前回の実行完了からこの秒数以内の呼び出しには前回の結果を返す
+UPDATE_MIN_INTERVAL_SEC = float(os.environ.get("UPDATE_MIN_INTERVAL_SEC", "60"))
+SYNC_MIN_INTERVAL_SEC = float(os.environ.get("SYNC_MIN_INTERVAL_SEC", "10"))
+
+class SingleFlight:
+    """
+    同じキーに対する同時実行をまとめるクラス。
+    実行中の呼び出しがあれば新たに実行せずにその結果を待ち、
+    直前に成功した実行があれば最小実行間隔の間はその結果を返します。
+    """
+
+    def __init__(self, name: str, min_interval_sec: float = 0):
+        self.name = name
+        self.min_interval_sec = min_interval_sec
+        self.inflight: Dict[str, asyncio.Future] = {}
+        # キーごとの直前の成功結果（完了時刻, 完了日時, 結果）
+        self.last_results: Dict[str, Tuple[float, datetime, Any]] = {}
+        self.runs = 0
+        self.coalesced = 0
+        self.reused = 0
+        self.failures = 0
+        self.last_started_at: Optional[datetime] = None
+        self.last_finished_at: Optional[datetime] = None
+        self.last_duration_ms: Optional[float] = None
+
+    async def run(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        reusable: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        キーごとに1つだけ fn を実行し、同時に呼び出した全員にその結果を返します。
+        reusable を指定した場合は、それが True を返す結果のみ最小実行間隔の間再利用します。
+        """
+        result, _ = await self.run_detailed(key, fn, reusable)
+        return result
+
+    async def run_detailed(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        reusable: Optional[Callable[[Any], bool]] = None,
+        force: bool = False
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        run と同じですが、結果がどのように得られたかを合わせて返します。
+        戻り値: (結果, {"reused": 前回の結果を再利用したか, "coalesced": 実行中の呼び出しにまとめたか,
+                       "finished_at": 結果を得た実行の完了日時})
+        force を指定した場合は前回の結果を再利用せずに実行します（実行中の呼び出しにはまとめる）。
+        """
+        future = self.inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            logger.info(f"Coalesced {self.name} call into in-flight run ({key})")
+            # 呼び出し元が切断しても実行中の処理は中断しない
+            result, finished_at = await asyncio.shield(future)
+            return result, {"reused": False, "coalesced": True, "finished_at": finished_at}
+
+        now = time.monotonic()
+        self._evict(now)
+        last = self.last_results.get(key)
+        if last is not None and not force:
+            self.reused += 1
+            logger.info(f"Reusing {self.name} result finished {now - last[0]:.1f}s ago ({key})")
+            return last[2], {"reused": True, "coalesced": False, "finished_at": last[1]}
+
+        future = asyncio.ensure_future(self._execute(key, fn, reusable))
+        self.inflight[key] = future
+        result, finished_at = await asyncio.shield(future)
+        return result, {"reused": False, "coalesced": False, "finished_at": finished_at}
+
+    async def _execute(
+        self, key: str, fn: Callable[[], Awaitable[Any]], reusable: Optional[Callable[[Any], bool]]
+    ) -> Tuple[Any, datetime]:
+        self.runs += 1
+        self.last_started_at = datetime.now(timezone.utc)
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except Exception:
+            self.failures += 1
+            raise
+        else:
+            finished_at = datetime.now(timezone.utc)
+            if self.min_interval_sec > 0 and (reusable is None or reusable(result)):
+                self.last_results[key] = (time.monotonic(), finished_at, result)
+            return result, finished_at
+        finally:
+            self.inflight.pop(key, None)
+            self.last_finished_at = datetime.now(timezone.utc)
+            self.last_duration_ms = (time.monotonic() - started) * 1000
+
+    def _evict(self, now: float) -> None:
+        for key, (finished, _, _) in list(self.last_results.items()):
+            if now - finished >= self.min_interval_sec:
+                del self.last_results[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """監視用の統計情報を返します"""
+        return {
+            "name": self.name,
+            "min_interval_sec": self.min_interval_sec,
+            "in_flight": len(self.inflight),
+            "runs": self.runs,
+            "coalesced": self.coalesced,
+            "reused": self.reused,
+            "failures": self.failures,
+            "last_started_at": self.last_started_at,
+            "last_finished_at": self.last_finished_at,
+            "last_duration_ms": round(self.last_duration_ms, 3) if self.last_duration_ms is not None else None
+        }
+
+# コンテスト情報の更新（キーは常に "update"）とユーザーごとのカレンダー同期
+update_flight = SingleFlight("update", UPDATE_MIN_INTERVAL_SEC)
+sync_flight = SingleFlight("sync", SYNC_MIN_INTERVAL_SEC)
@@ -0,0 +1,7 @@
+from datetime import datetime, timezone
+
+def to_naive_utc(value: datetime) -> datetime:
+    """DBのDateTimeカラムと比較できるようにUTCのnaiveな日時に変換"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
@@ -2,16 +2,24 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import contests
 from app.api import settings
+from app.api import history
+from app.api import admin
 from app.core.scheduler import ContestScheduler
 from app.core.logger import logger
 from app.core.database import engine, Base
-from app.models import contest, setting
+from app.core.profiling import ProfilingMiddleware, install_sql_profiling
+from app.core.rate_limit import RateLimitMiddleware
+from app.models import contest, contest_change, contest_history, setting, source_snapshot, backfill_checkpoint
+from app.models import calendar_sync_state, calendar_event_link
 
 app = FastAPI(title="Contest Calendar API")
 
 # データベーステーブルの作成
 Base.metadata.create_all(bind=engine)
 
+# クライアントごとの流量制限と過負荷時の負荷遮断（429はCORSヘッダ付きで返す）
+app.add_middleware(RateLimitMiddleware)
+
 # CORSの設定
 app.add_middleware(
     CORSMiddleware,
@@ -21,8 +29,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# リクエスト単位のプロファイリング（PROFILING_ENABLED=true かつ管理者ヘッダ付きのリクエストのみ）
+app.add_middleware(ProfilingMiddleware)
+install_sql_profiling(engine)
+
 # APIルーターの登録
 app.include_router(contests.router, prefix="/api")
+app.include_router(history.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
 app.include_router(settings.router, prefix="/api")
 
 # スケジューラーの初期化
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Integer, DateTime
+from app.core.database import Base
+
+class BackfillCheckpoint(Base):
+    """過去のコンテストの取り込み（バックフィル）の進捗"""
+    __tablename__ = "backfill_checkpoints"
+
+    source = Column(String, primary_key=True)  # atcoder, codeforces
+    # 最後に書き込んだコンテストの (開始時刻, プラットフォーム, ID)。再開時はこれより後から処理する
+    last_start_time = Column(DateTime, nullable=True)
+    last_platform = Column(String, nullable=True)
+    last_id = Column(String, nullable=True)
+    rows_written = Column(Integer, nullable=False, default=0)
+    completed_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
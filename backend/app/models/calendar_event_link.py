@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Boolean, DateTime
+from app.core.database import Base
+
+class CalendarEventLink(Base):
+    """コンテストと、それを同期したGoogleカレンダーのイベントの対応"""
+    __tablename__ = "calendar_event_links"
+
+    user_id = Column(String, primary_key=True)
+    calendar_id = Column(String, primary_key=True)
+    platform = Column(String, primary_key=True)
+    contest_id = Column(String, primary_key=True)
+    event_id = Column(String, nullable=False)
+    # 最後に書き込んだイベント内容のハッシュ。コンテストの変更の検出に使う
+    content_hash = Column(String, nullable=True)
+    etag = Column(String, nullable=True)
+    # ユーザーがカレンダーから削除した場合は True（再作成しない）
+    removed = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, nullable=True)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime
+from app.core.database import Base
+
+class CalendarSyncState(Base):
+    """ユーザー・カレンダーごとのGoogleカレンダーの増分同期の状態"""
+    __tablename__ = "calendar_sync_states"
+
+    user_id = Column(String, primary_key=True)
+    calendar_id = Column(String, primary_key=True)
+    # events.list の nextSyncToken。次回はこれ以降に変更されたイベントのみ取得する
+    sync_token = Column(String, nullable=True)
+    last_full_sync_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
@@ -1,14 +1,16 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text
+from sqlalchemy import Column, String, Integer, DateTime, Text, PrimaryKeyConstraint
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class Contest(Base):
     __tablename__ = "contests"
+    # コンテストIDはOJごとに採番されるため (platform, id) で一意とする
+    __table_args__ = (PrimaryKeyConstraint("platform", "id", name="contests_pkey"),)
 
-    id = Column(String, primary_key=True)  # 例: abc350
+    id = Column(String, nullable=False)  # 例: abc350
     platform = Column(String, nullable=False)  # atcoder, codeforces, omc
     title = Column(Text, nullable=False)
-    start_time = Column(DateTime, nullable=False)
+    start_time = Column(DateTime, nullable=False, index=True)
     duration_min = Column(Integer, nullable=False)
     url = Column(Text, nullable=False)
     created_at = Column(DateTime, server_default=func.now()) 
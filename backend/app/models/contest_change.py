@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, DateTime, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class ContestChange(Base):
+    """コンテストの変更履歴（差分同期用のチェンジログ）"""
+    __tablename__ = "contest_changes"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)  # 単調増加のシーケンス番号
+    contest_id = Column(String, nullable=False)
+    platform = Column(String, nullable=False)
+    op = Column(String, nullable=False)  # insert, update, delete
+    changes = Column(JSON, nullable=True)  # 変更されたフィールドと新しい値
+    changed_at = Column(DateTime, server_default=func.now(), index=True)
+
+class ContestChangeWatermark(Base):
+    """チェンジログの圧縮で削除した範囲（これ以下のシーケンス番号の変更は取得できない）"""
+    __tablename__ = "contest_change_watermarks"
+
+    name = Column(String, primary_key=True)  # compacted
+    seq = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, nullable=True)
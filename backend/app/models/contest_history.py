@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class ContestHistory(Base):
+    """終了したコンテストのアーカイブ（PostgreSQLでは開始時刻で年ごとにパーティション分割）"""
+    __tablename__ = "contest_history"
+    __table_args__ = (
+        Index("ix_contest_history_platform_start_time", "platform", "start_time"),
+        {"postgresql_partition_by": "RANGE (start_time)"},
+    )
+
+    # パーティションキーを主キーに含める必要があるため start_time も主キーとする
+    platform = Column(String, primary_key=True)
+    id = Column(String, primary_key=True)
+    start_time = Column(DateTime, primary_key=True)
+    title = Column(Text, nullable=False)
+    duration_min = Column(Integer, nullable=False)
+    url = Column(Text, nullable=False)
+    created_at = Column(DateTime)
+    archived_at = Column(DateTime, server_default=func.now())
@@ -1,12 +1,16 @@
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, UniqueConstraint
 from app.core.database import Base
-from sqlalchemy.sql.sqltypes import Integer
 
 class Setting(Base):
-    """ユーザーの設定モデル"""
+    """ユーザーの設定モデル（デフォルトから変更したプラットフォームのみ保存する）"""
     __tablename__ = "settings"
+    __table_args__ = (
+        UniqueConstraint("user_id", "platform", name="uq_settings_user_platform"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String, nullable=False, index=True)
     platform = Column(String, index=True)
     notify_before_min = Column(Integer, default=30)
-    enabled = Column(Boolean, default=True) 
+    enabled = Column(Boolean, default=True)
+    updated_at = Column(DateTime, nullable=True)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Integer, DateTime, JSON
+from app.core.database import Base
+
+class SourceSnapshot(Base):
+    """取得元ごとの最後に正常に取得できたコンテスト一覧（last-known-good）"""
+    __tablename__ = "source_snapshots"
+
+    source = Column(String, primary_key=True)  # atcoder, codeforces
+    payload = Column(JSON, nullable=False)  # ContestCreate の一覧
+    content_hash = Column(String, nullable=False)
+    contest_count = Column(Integer, nullable=False)
+    fetched_at = Column(DateTime, nullable=False)
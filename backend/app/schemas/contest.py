@@ -10,10 +10,23 @@ class ContestBase(BaseModel):
 
 class ContestCreate(ContestBase):
     id: str
+    source: str = "native"  # 取得元（native, aggregator など）。重複時の優先度に使用
 
 class Contest(ContestBase):
     id: str
     created_at: datetime
 
     class Config:
-        from_attributes = True 
+        from_attributes = True
+
+class ContestSearchResult(ContestBase):
+    """コンテスト検索結果のレスポンススキーマ"""
+    id: str
+    archived: bool
+    rank: float
+
+class FreeSlot(BaseModel):
+    """コンテストと重ならない空き時間帯"""
+    start: datetime
+    end: datetime
+    duration_min: int
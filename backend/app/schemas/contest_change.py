@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+class ContestChange(BaseModel):
+    """コンテスト変更履歴のレスポンススキーマ"""
+    seq: int
+    contest_id: str
+    platform: str
+    op: str
+    changes: Optional[Dict[str, Any]] = None
+    changed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ContestChangeList(BaseModel):
+    """差分取得APIのレスポンススキーマ"""
+    changes: List[ContestChange]
+    latest_seq: int
+    has_more: bool
+    reset: bool  # Trueの場合はログが圧縮済みのため全件を再取得する必要がある
@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+from app.schemas.contest import ContestBase
+
+class ContestHistory(ContestBase):
+    """アーカイブ済みコンテストのレスポンススキーマ"""
+    id: str
+    created_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class MonthlyContestCount(BaseModel):
+    """プラットフォーム別・月別のコンテスト数"""
+    platform: str
+    month: str  # 例: 2025-05
+    count: int
@@ -12,8 +12,8 @@ class SettingCreate(SettingBase):
     pass
 
 class Setting(SettingBase):
-    """設定レスポンス用スキーマ"""
-    id: int
+    """設定レスポンス用スキーマ（デフォルトのままのプラットフォームは id が None）"""
+    id: Optional[int] = None
 
     class Config:
         from_attributes = True 
@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+from app.schemas.contest import ContestCreate
+
+class SourceFetchResult(BaseModel):
+    """取得元ごとの取得結果"""
+    source: str
+    # fresh: 新しいデータを取得 / unchanged: 前回と同じ内容 / snapshot: 障害のため前回のデータを使用
+    status: str
+    contests: List[ContestCreate]
+    error: Optional[str] = None
+
+class SourceStatus(BaseModel):
+    """監視用の取得元の状態"""
+    source: str
+    state: str  # closed, open, half_open
+    failures: int
+    retry_in_sec: Optional[int] = None
+    last_error: Optional[str] = None
+    last_failure_at: Optional[datetime] = None
+    last_success_at: Optional[datetime] = None
+    snapshot_fetched_at: Optional[datetime] = None
+    snapshot_contests: Optional[int] = None
@@ -1,24 +1,52 @@
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from app.models.calendar_event_link import CalendarEventLink
+from app.models.calendar_sync_state import CalendarSyncState
 from app.models.contest import Contest
+from app.services.user_settings import UserSettings
 from app.core.logger import logger
+from app.core.profiling import ProfiledHttp
 import google.oauth2.credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
+from google_auth_httplib2 import AuthorizedHttp
+import hashlib
 import os
 import json
 
+# このサービスが作成したイベントに付ける非公開の拡張プロパティ
+EVENT_TAG_KEY = "contestCalendar"
+EVENT_TAG_VALUE = "1"
+EVENT_CONTEST_KEY = "contestKey"
+# 最後に書き込んだ内容のハッシュ（対応表を保存しない場合も、変更がなければ更新しない）
+EVENT_HASH_KEY = "contentHash"
+
 class CalendarSyncService:
     """
     Googleカレンダーへのコンテスト同期を行うサービスクラス
     """
     
-    def __init__(self, db: Session, access_token: Optional[str] = None, refresh_token: Optional[str] = None, id_token: Optional[str] = None):
+    def __init__(
+        self,
+        db: Session,
+        access_token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+        id_token: Optional[str] = None,
+        settings: Optional[UserSettings] = None,
+        user_id: Optional[str] = None
+    ):
         self.db = db
+        # 同期の状態とイベントの対応表は検証済みのユーザー・カレンダーごとに保持する
+        # （ユーザーを識別できない場合は保存せず、毎回すべてのイベントを取得する）
+        self.user_id = user_id
         self.access_token = access_token
         self.refresh_token = refresh_token
         self.id_token = id_token
+        # ユーザーの設定（無効にしたプラットフォームは同期しない）
+        self.settings = settings
     
     async def sync_contests_to_calendar(self) -> Dict[str, Any]:
         """
@@ -36,9 +64,11 @@ class CalendarSyncService:
             
             # 開催予定のコンテストを取得
             now = datetime.utcnow()
-            upcoming_contests = self.db.query(Contest).filter(
-                Contest.start_time >= now
-            ).order_by(Contest.start_time).all()
+            query = self.db.query(Contest).filter(Contest.start_time >= now)
+            platform_filter = self.settings.platform_filter(Contest.platform) if self.settings else None
+            if platform_filter is not None:
+                query = query.filter(platform_filter)
+            upcoming_contests = query.order_by(Contest.start_time).all()
             
             logger.info(f"Found {len(upcoming_contests)} upcoming contests to sync")
             
@@ -114,7 +144,10 @@ class CalendarSyncService:
                 
                 # Google Calendar APIサービスを作成
                 logger.info("Building Google Calendar API service")
-                service = build('calendar', 'v3', credentials=credentials)
+                # プロファイリング時に外部HTTP呼び出しを記録できるようにHTTPオブジェクトをラップ
+                http = ProfiledHttp(AuthorizedHttp(credentials, http=build_http()))
+                # Google APIの呼び出しはブロッキングのため、イベントループを止めないようスレッドで実行する
+                service = await run_in_threadpool(build, 'calendar', 'v3', http=http)
                 logger.info("Successfully built Google Calendar API service")
                 
                 # カレンダーIDを取得（プライマリカレンダーを使用）
@@ -123,7 +156,7 @@ class CalendarSyncService:
                 
                 # カレンダー情報を取得して確認
                 try:
-                    calendar_info = service.calendars().get(calendarId=calendar_id).execute()
+                    calendar_info = await run_in_threadpool(service.calendars().get(calendarId=calendar_id).execute)
                     logger.info(f"Successfully accessed calendar: {calendar_info.get('summary')}")
                 except Exception as e:
                     logger.error(f"Error accessing calendar: {str(e)}")
@@ -133,107 +166,17 @@ class CalendarSyncService:
                         "synced_contests": 0
                     }
                 
-                # 同期済みイベント数をカウント
-                synced_count = 0
-                
-                # 処理するコンテストの数を出力
+                # 前回の同期以降に変更されたイベントのみ取得して突き合わせ、差分だけを書き込む
                 logger.info(f"Processing {len(upcoming_contests)} upcoming contests")
-                
-                for contest in upcoming_contests:
-                    # イベントの開始時間と終了時間を計算
-                    start_time = contest.start_time
-                    end_time = start_time + timedelta(minutes=contest.duration_min)
-                    
-                    # イベント情報を作成
-                    event = {
-                        'summary': f"[{contest.platform.upper()}] {contest.title}",
-                        'description': f"コンテストURL: {contest.url}",
-                        'start': {
-                            'dateTime': start_time.isoformat(),
-                            'timeZone': 'Asia/Tokyo',
-                        },
-                        'end': {
-                            'dateTime': end_time.isoformat(),
-                            'timeZone': 'Asia/Tokyo',
-                        },
-                        'reminders': {
-                            'useDefault': True
-                        },
-                    }
-                    
-                    try:
-                        # 既存のイベントを検索（重複防止）
-                        # より厳密な検索条件を設定
-                        # タイトルの一部とURLの一部を組み合わせて検索
-                        platform_tag = f"[{contest.platform.upper()}]"
-                        logger.info(f"Searching for existing event with platform tag: {platform_tag}")
-                        
-                        # 開始時間の前後1日で検索
-                        time_min = (start_time - timedelta(days=1)).isoformat() + 'Z'
-                        time_max = (start_time + timedelta(days=1)).isoformat() + 'Z'
-                        
-                        events_result = service.events().list(
-                            calendarId=calendar_id,
-                            q=platform_tag,
-                            timeMin=time_min,
-                            timeMax=time_max,
-                            singleEvents=True
-                        ).execute()
-                        
-                        existing_events = events_result.get('items', [])
-                        logger.info(f"Found {len(existing_events)} existing events in the time range")
-                        
-                        # 既存イベントの中から、このコンテストと一致するものを探す
-                        is_duplicate = False
-                        for existing in existing_events:
-                            existing_summary = existing.get('summary', '')
-                            existing_desc = existing.get('description', '')
-                            
-                            # タイトルとURLの両方が一致する場合は重複とみなす
-                            if (platform_tag in existing_summary and 
-                                contest.title in existing_summary and
-                                contest.url in existing_desc):
-                                is_duplicate = True
-                                logger.info(f"Found duplicate event: {existing_summary}")
-                                break
-                        
-                        if not is_duplicate:
-                            # イベントを作成
-                            logger.info(f"Creating new event for contest: {contest.title}")
-                            try:
-                                # イベント情報をログ出力
-                                logger.info(f"Event data: {json.dumps(event)}")
-                                
-                                # イベント作成を試行
-                                created_event = service.events().insert(
-                                    calendarId=calendar_id,
-                                    body=event
-                                ).execute()
-                                
-                                # 作成されたイベントのリンクを表示
-                                event_link = created_event.get('htmlLink', 'No link available')
-                                logger.info(f"Event created successfully: {event_link}")
-                                synced_count += 1
-                            except HttpError as error:
-                                error_content = error.content.decode() if hasattr(error, 'content') else str(error)
-                                logger.error(f"Error creating event for contest {contest.title}: {error_content}")
-                                # エラーの詳細情報を出力
-                                if hasattr(error, 'resp'):
-                                    logger.error(f"Response status: {error.resp.status}")
-                                    logger.error(f"Response reason: {error.resp.reason}")
-                        else:
-                            logger.info(f"Skipping duplicate event for contest: {contest.title}")
-                    
-                    except HttpError as error:
-                        logger.error(f"Error searching for events: {error.content.decode() if hasattr(error, 'content') else str(error)}")
-                        if hasattr(error, 'resp'):
-                            logger.error(f"Response status: {error.resp.status}")
-                            logger.error(f"Response reason: {error.resp.reason}")
+                result = await run_in_threadpool(self._sync_events, service, calendar_id, upcoming_contests)
                 
                 return {
                     "success": True,
-                    "message": f"{synced_count}件のコンテストをカレンダーに同期しました",
-                    "synced_contests": synced_count
+                    "message": f"{result['created']}件のコンテストをカレンダーに同期しました",
+                    "synced_contests": result["created"],
+                    "updated_events": result["updated"],
+                    "remote_changes": result["remote_changes"],
+                    "full_resync": result["full_resync"]
                 }
                 
             except Exception as e:
@@ -251,3 +194,239 @@ class CalendarSyncService:
                 "message": f"カレンダー同期に失敗しました: {str(e)}",
                 "synced_contests": 0
             } 
+
+    def _sync_events(self, service, calendar_id: str, contests: List[Contest]) -> Dict[str, Any]:
+        """
+        Googleカレンダーのイベントとコンテストを突き合わせます。
+        nextSyncToken を使って前回以降に変更されたイベントのみ取得し、
+        トークンが無効（410 Gone）の場合はすべてのイベントを取得し直します。
+        """
+        state = self.db.get(CalendarSyncState, (self.user_id, calendar_id)) if self._persistent else None
+        if state is None:
+            state = CalendarSyncState(user_id=self.user_id, calendar_id=calendar_id)
+            self._track(state)
+        links = {
+            (link.platform, link.contest_id): link
+            for link in self.db.query(CalendarEventLink).filter(
+                CalendarEventLink.user_id == self.user_id,
+                CalendarEventLink.calendar_id == calendar_id
+            ).all()
+        } if self._persistent else {}
+
+        full_resync = state.sync_token is None
+        if not full_resync:
+            try:
+                events, next_sync_token = self._list_events(service, calendar_id, state.sync_token)
+            except HttpError as error:
+                if error.resp.status != 410:
+                    raise
+                logger.warning(f"Sync token for user {self.user_id} expired, running full resync")
+                full_resync = True
+        if full_resync:
+            events, next_sync_token = self._list_events(service, calendar_id, None)
+
+        logger.info(f"Fetched {len(events)} changed calendar events (full resync: {full_resync})")
+        self._reconcile_remote_events(calendar_id, events, links, contests, service, full_resync)
+
+        created = 0
+        updated = 0
+        for contest in contests:
+            event = self._event_body(contest)
+            content_hash = event["extendedProperties"]["private"][EVENT_HASH_KEY]
+            link = links.get((contest.platform, contest.id))
+            try:
+                if link is None:
+                    created_event = service.events().insert(calendarId=calendar_id, body=event).execute()
+                    logger.info(f"Event created successfully: {created_event.get('htmlLink', 'No link available')}")
+                    link = CalendarEventLink(
+                        user_id=self.user_id,
+                        calendar_id=calendar_id,
+                        platform=contest.platform,
+                        contest_id=contest.id,
+                        event_id=created_event["id"],
+                        removed=False
+                    )
+                    self._track(link)
+                    links[(contest.platform, contest.id)] = link
+                    created += 1
+                elif link.removed or link.content_hash == content_hash:
+                    # ユーザーが削除したイベントは再作成せず、内容が変わっていないイベントには触れない
+                    continue
+                else:
+                    # コンテスト側が変更された場合のみ更新する（ユーザーによる編集はそのまま残る）
+                    created_event = service.events().patch(
+                        calendarId=calendar_id, eventId=link.event_id, body=event
+                    ).execute()
+                    logger.info(f"Event updated for contest: {contest.title}")
+                    updated += 1
+            except HttpError as error:
+                logger.error(f"Error syncing event for contest {contest.title}: {error.content.decode() if hasattr(error, 'content') else str(error)}")
+                if hasattr(error, 'resp'):
+                    logger.error(f"Response status: {error.resp.status}")
+                    # 前回の取得以降にカレンダーから削除されていた場合は再作成しない
+                    if link is not None and error.resp.status in (404, 410):
+                        link.removed = True
+                continue
+            link.content_hash = content_hash
+            link.etag = created_event.get("etag")
+            link.updated_at = datetime.utcnow()
+
+        state.sync_token = next_sync_token
+        state.updated_at = datetime.utcnow()
+        if full_resync:
+            state.last_full_sync_at = state.updated_at
+        if self._persistent:
+            self.db.commit()
+
+        return {
+            "created": created,
+            "updated": updated,
+            "remote_changes": len(events),
+            "full_resync": full_resync
+        }
+
+    @property
+    def _persistent(self) -> bool:
+        return self.user_id is not None
+
+    def _track(self, obj) -> None:
+        """ユーザーを識別できる場合のみ、同期の状態・対応表をDBに保存する"""
+        if self._persistent:
+            self.db.add(obj)
+
+    def _list_events(self, service, calendar_id: str, sync_token: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        イベントを全ページ取得し、(イベント一覧, nextSyncToken) を返します。
+        sync_token を指定した場合は、それ以降に変更・削除されたイベントのみを返します。
+        """
+        events = []
+        page_token = None
+        # 同期トークンを保存できない場合は毎回全件取得になるため、終了済みのイベントは取得しない
+        # （timeMin は syncToken と併用できず、保存する場合は初回の取得条件を変えられない）
+        time_min = None if self._persistent else datetime.utcnow().isoformat() + "Z"
+        while True:
+            params = {"calendarId": calendar_id, "maxResults": 250}
+            if time_min:
+                params["timeMin"] = time_min
+            if sync_token:
+                params["syncToken"] = sync_token
+            if page_token:
+                params["pageToken"] = page_token
+            # 全件取得でも削除済み（cancelled）のイベントを含め、ユーザーが削除したイベントを再作成しない
+            params["showDeleted"] = True
+            result = service.events().list(**params).execute()
+            events.extend(result.get("items", []))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return events, result.get("nextSyncToken")
+
+    def _reconcile_remote_events(
+        self,
+        calendar_id: str,
+        events: List[Dict[str, Any]],
+        links: Dict[Tuple[str, str], CalendarEventLink],
+        contests: List[Contest],
+        service,
+        full_resync: bool
+    ) -> None:
+        """カレンダー側で変更・削除されたイベントを対応表に反映します"""
+        links_by_event = {link.event_id: link for link in links.values()}
+        seen_event_ids = set()
+        # 以前のバージョンで作成したタグのないイベントをURLで対応付けるため
+        contests_by_description = (
+            {self._event_body(contest)["description"]: contest for contest in contests} if full_resync else {}
+        )
+
+        for event in events:
+            seen_event_ids.add(event["id"])
+            properties = event.get("extendedProperties", {}).get("private", {})
+            link = links_by_event.get(event["id"])
+
+            if link is None and properties.get(EVENT_TAG_KEY) == EVENT_TAG_VALUE:
+                # 対応表にないタグ付きイベント（対応表を失った場合など）は取り込む
+                platform, _, contest_id = properties.get(EVENT_CONTEST_KEY, "").partition(":")
+                if not contest_id or (platform, contest_id) in links:
+                    continue
+                link = CalendarEventLink(
+                    user_id=self.user_id,
+                    calendar_id=calendar_id,
+                    platform=platform,
+                    contest_id=contest_id,
+                    event_id=event["id"],
+                    removed=False,
+                    # 最後に書き込んだ内容と同じであれば更新しない
+                    content_hash=properties.get(EVENT_HASH_KEY)
+                )
+                self._track(link)
+                links[(platform, contest_id)] = link
+            elif link is None and contests_by_description and event.get("status") != "cancelled":
+                contest = contests_by_description.get(event.get("description"))
+                if contest is None or (contest.platform, contest.id) in links:
+                    continue
+                # タグを付けて次回以降の増分同期で追跡できるようにする
+                service.events().patch(
+                    calendarId=calendar_id,
+                    eventId=event["id"],
+                    body={"extendedProperties": {"private": self._event_tags(contest)}}
+                ).execute()
+                link = CalendarEventLink(
+                    user_id=self.user_id,
+                    calendar_id=calendar_id,
+                    platform=contest.platform,
+                    contest_id=contest.id,
+                    event_id=event["id"],
+                    removed=False
+                )
+                self._track(link)
+                links[(contest.platform, contest.id)] = link
+                logger.info(f"Adopted existing event for contest: {contest.title}")
+            if link is None:
+                continue
+
+            if event.get("status") == "cancelled":
+                logger.info(f"Event for {link.platform}:{link.contest_id} was deleted from the calendar")
+                link.removed = True
+            else:
+                link.removed = False
+                link.etag = event.get("etag")
+            link.updated_at = datetime.utcnow()
+
+        if full_resync:
+            # 全件取得で見つからなかったイベントはカレンダーから削除されている
+            for link in links.values():
+                if link.event_id not in seen_event_ids and not link.removed:
+                    link.removed = True
+                    link.updated_at = datetime.utcnow()
+
+    def _event_tags(self, contest: Contest) -> Dict[str, str]:
+        return {EVENT_TAG_KEY: EVENT_TAG_VALUE, EVENT_CONTEST_KEY: f"{contest.platform}:{contest.id}"}
+
+    def _event_body(self, contest: Contest) -> Dict[str, Any]:
+        """コンテストのイベント情報を作成"""
+        # イベントの開始時間と終了時間を計算
+        start_time = contest.start_time
+        end_time = start_time + timedelta(minutes=contest.duration_min)
+        event = {
+            'summary': f"[{contest.platform.upper()}] {contest.title}",
+            'description': f"コンテストURL: {contest.url}",
+            'start': {
+                'dateTime': start_time.isoformat(),
+                'timeZone': 'Asia/Tokyo',
+            },
+            'end': {
+                'dateTime': end_time.isoformat(),
+                'timeZone': 'Asia/Tokyo',
+            },
+            'reminders': {
+                'useDefault': True
+            },
+            # このサービスが作成したイベントであることを示すタグ
+            'extendedProperties': {
+                'private': self._event_tags(contest)
+            },
+        }
+        event['extendedProperties']['private'][EVENT_HASH_KEY] = self._content_hash(event)
+        return event
+
+    def _content_hash(self, event: Dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps(event, sort_keys=True).encode("utf-8")).hexdigest()
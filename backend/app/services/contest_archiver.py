@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+import os
+from sqlalchemy.orm import Session
+from sqlalchemy import func, text, tuple_
+from app.models.contest import Contest
+from app.models.contest_history import ContestHistory
+from app.services.contest_change_log import ContestChangeLog
+from app.services.interval_index import interval_index
+from app.core.broadcaster import broadcaster
+from app.core.logger import logger
+
+# 開始から何日経過したコンテストをアーカイブするか
+ARCHIVE_AFTER_DAYS = int(os.environ.get("CONTEST_ARCHIVE_AFTER_DAYS", "7"))
+# 1トランザクションで移動する件数（ロック時間を短く保つため小さめにする）
+ARCHIVE_BATCH_SIZE = int(os.environ.get("CONTEST_ARCHIVE_BATCH_SIZE", "500"))
+# パーティション作成時に親テーブルのロックを待つ上限（待っている間は履歴の読み取りも止まるため短くする）
+PARTITION_LOCK_TIMEOUT = os.environ.get("CONTEST_HISTORY_PARTITION_LOCK_TIMEOUT", "5s")
+
+# 作成済みのパーティション（年）のキャッシュ
+_known_partitions: Set[int] = set()
+
+def forget_partitions() -> None:
+    """削除などで状態が変わったパーティションを再確認できるようにキャッシュを破棄します"""
+    _known_partitions.clear()
+
+class ContestArchiver:
+    """
+    開始から一定期間が経過したコンテストを contests テーブルから
+    contest_history テーブルへバッチ単位で移動するサービスクラス
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def archive(self, cutoff: Optional[datetime] = None, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+        """
+        cutoff より前に開始したコンテストをアーカイブします。
+        バッチごとにコミットするため、長時間のロックは発生しません。
+        必要なパーティションは行ロックを取る前に別トランザクションで作成しておきます。
+        戻り値: アーカイブされたコンテスト数
+        """
+        if cutoff is None:
+            cutoff = datetime.utcnow() - timedelta(days=ARCHIVE_AFTER_DAYS)
+
+        archived_count = 0
+        try:
+            self._prepare_partitions(cutoff)
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Failed to prepare contest_history partitions: {str(e)}")
+            raise
+
+        while True:
+            try:
+                moved = self._archive_batch(cutoff, batch_size)
+            except Exception as e:
+                self.db.rollback()
+                forget_partitions()
+                logger.error(f"Failed to archive contests: {str(e)}")
+                raise
+            archived_count += moved
+            if moved < batch_size:
+                break
+
+        if archived_count:
+            logger.info(f"Archived {archived_count} contests into contest_history")
+        return archived_count
+
+    def _prepare_partitions(self, cutoff: datetime) -> None:
+        # ロックを取らない読み取りで対象の年の範囲を求める
+        oldest, newest = self.db.query(
+            func.min(Contest.start_time), func.max(Contest.start_time)
+        ).filter(Contest.start_time < cutoff).one()
+        self.db.commit()
+        if oldest is not None:
+            self.ensure_partitions(range(oldest.year, newest.year + 1))
+
+    def _archive_batch(self, cutoff: datetime, batch_size: int) -> int:
+        # 他のトランザクションがロック中の行は飛ばして次回に回す
+        contests: List[Contest] = self.db.query(Contest).filter(
+            Contest.start_time < cutoff
+        ).order_by(Contest.start_time).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not contests:
+            self.db.commit()
+            return 0
+
+        self.write_history([
+            {
+                "platform": contest.platform,
+                "id": contest.id,
+                "start_time": contest.start_time,
+                "title": contest.title,
+                "duration_min": contest.duration_min,
+                "url": contest.url,
+                "created_at": contest.created_at
+            }
+            for contest in contests
+        ])
+
+        change_log = ContestChangeLog(self.db)
+        for contest in contests:
+            change_log.record_delete(contest.id, contest.platform)
+            self.db.delete(contest)
+
+        self.db.flush()
+        notifications = change_log.notifications()
+        self.db.commit()
+        broadcaster.publish(notifications)
+        interval_index.invalidate()
+        return len(contests)
+
+    def write_history(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        履歴テーブルに行を書き込みます（同じ主キーの行は置き換え）。
+        コミットは呼び出し元に任せます。
+        パーティションは事前に ensure_partitions で作成しておいてください。
+        """
+        if not rows:
+            return
+        # 通常は作成済み（キャッシュを確認するだけ）
+        self.ensure_partitions(row["start_time"].year for row in rows)
+
+        # 再アーカイブ時に主キーが重複しないよう既存の行を置き換える
+        keys = [(row["platform"], row["id"], row["start_time"]) for row in rows]
+        self.db.query(ContestHistory).filter(
+            tuple_(ContestHistory.platform, ContestHistory.id, ContestHistory.start_time).in_(keys)
+        ).delete(synchronize_session=False)
+        self.db.bulk_insert_mappings(ContestHistory, rows)
+
+    def ensure_partitions(self, years: Iterable[int]) -> None:
+        """
+        PostgreSQLの場合、指定した年のパーティションがなければ作成します。
+        作成には親テーブルの ACCESS EXCLUSIVE ロックが必要なため、セッションとは別の接続の
+        短いトランザクションで年ごとにコミットし、ロック待ちは PARTITION_LOCK_TIMEOUT で打ち切ります。
+        """
+        if self.db.bind.dialect.name != "postgresql":
+            return
+        missing = sorted(set(years) - _known_partitions)
+        if not missing:
+            return
+        with self.db.get_bind().connect() as conn:
+            for year in missing:
+                name = f"contest_history_{year}"
+                # 既に存在する場合は親テーブルのロックを取らない
+                if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+                    conn.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+                    conn.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} "
+                        f"PARTITION OF contest_history "
+                        f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+                    ))
+                    logger.info(f"Created contest_history partition for {year}")
+                conn.commit()
+                _known_partitions.add(year)
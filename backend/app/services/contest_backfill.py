@@ -0,0 +1,162 @@
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.models.backfill_checkpoint import BackfillCheckpoint
+from app.schemas.contest import ContestCreate
+from app.services.contest_archiver import ARCHIVE_AFTER_DAYS, ContestArchiver, forget_partitions
+from app.services.contest_fetcher import ContestFetcher
+from app.core.logger import logger
+from app.core.timeutil import to_naive_utc
+
+# 1回のコミットで書き込む件数と、稼働中のサービスへの影響を抑えるための書き込み速度の上限
+BACKFILL_CHUNK_SIZE = int(os.environ.get("BACKFILL_CHUNK_SIZE", "500"))
+BACKFILL_MAX_ROWS_PER_SEC = float(os.environ.get("BACKFILL_MAX_ROWS_PER_SEC", "1000"))
+
+class ContestBackfill:
+    """
+    過去のコンテストを取得元から取り込み、履歴テーブルに書き込むサービスクラス。
+    一定件数ごとにコミットしてチェックポイントを記録するため、中断しても続きから再開できます。
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        chunk_size: int = BACKFILL_CHUNK_SIZE,
+        max_rows_per_sec: float = BACKFILL_MAX_ROWS_PER_SEC
+    ):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.max_rows_per_sec = max_rows_per_sec
+        self.fetcher = ContestFetcher(db)
+        self.archiver = ContestArchiver(db)
+
+    async def run(self, sources: Optional[List[str]] = None, restart: bool = False) -> Dict[str, int]:
+        """
+        指定した取得元（省略時はすべて）のバックフィルを実行します。
+        戻り値: 取得元ごとの今回書き込んだ件数
+        """
+        results = {}
+        for source in sources or list(self.fetcher.sources):
+            results[source] = await self.backfill_source(source, restart)
+        return results
+
+    async def backfill_source(self, source: str, restart: bool = False) -> int:
+        checkpoint = self._load_checkpoint(source, restart)
+        if checkpoint.completed_at and not restart:
+            logger.info(f"Backfill for {source} already completed at {checkpoint.completed_at}, writing only contests after the checkpoint")
+
+        contests = await self.fetcher.fetch_history(source)
+
+        # 直近のコンテストは通常の更新処理に任せ、アーカイブ対象の期間のみ取り込む
+        cutoff = datetime.utcnow() - timedelta(days=ARCHIVE_AFTER_DAYS)
+        pending = sorted(
+            (c for c in contests if to_naive_utc(c.start_time) < cutoff),
+            key=self._sort_key
+        )
+        if checkpoint.last_start_time is not None:
+            resume_after = (checkpoint.last_start_time, checkpoint.last_platform, checkpoint.last_id)
+            pending = [c for c in pending if self._sort_key(c) > resume_after]
+
+        logger.info(f"Backfilling {len(pending)} {source} contests (chunk size {self.chunk_size})")
+        # パーティションはチャンクのトランザクションの外で先に作成しておく
+        self.archiver.ensure_partitions(to_naive_utc(c.start_time).year for c in pending)
+
+        started = time.monotonic()
+        written = 0
+
+        for offset in range(0, len(pending), self.chunk_size):
+            chunk_started = time.monotonic()
+            chunk = pending[offset:offset + self.chunk_size]
+            try:
+                self._write_chunk(checkpoint, chunk)
+            except Exception as e:
+                self.db.rollback()
+                forget_partitions()
+                logger.error(f"Backfill for {source} failed after {written} rows: {str(e)}")
+                raise
+            written += len(chunk)
+
+            elapsed = time.monotonic() - started
+            logger.info(
+                f"Backfill {source}: {written}/{len(pending)} rows "
+                f"({written / elapsed if elapsed > 0 else 0:.0f} rows/sec)"
+            )
+
+            # 書き込み速度が上限を超えないよう待機する
+            if self.max_rows_per_sec > 0:
+                wait = len(chunk) / self.max_rows_per_sec - (time.monotonic() - chunk_started)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+        checkpoint.completed_at = datetime.utcnow()
+        checkpoint.updated_at = checkpoint.completed_at
+        self.db.commit()
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"Backfill for {source} completed: {written} rows in {elapsed:.1f}s "
+            f"({written / elapsed if elapsed > 0 else 0:.0f} rows/sec)"
+        )
+        return written
+
+    def _write_chunk(self, checkpoint: BackfillCheckpoint, chunk: List[ContestCreate]) -> None:
+        # 履歴の書き込みとチェックポイントの更新を同じトランザクションでコミットする
+        self.archiver.write_history([
+            {
+                "platform": c.platform,
+                "id": c.id,
+                "start_time": to_naive_utc(c.start_time),
+                "title": c.title,
+                "duration_min": c.duration_min,
+                "url": str(c.url),
+                "created_at": datetime.utcnow()
+            }
+            for c in chunk
+        ])
+        last = chunk[-1]
+        checkpoint.last_start_time, checkpoint.last_platform, checkpoint.last_id = self._sort_key(last)
+        checkpoint.rows_written = (checkpoint.rows_written or 0) + len(chunk)
+        checkpoint.updated_at = datetime.utcnow()
+        self.db.commit()
+
+    def _load_checkpoint(self, source: str, restart: bool) -> BackfillCheckpoint:
+        checkpoint = self.db.get(BackfillCheckpoint, source)
+        if checkpoint is None:
+            checkpoint = BackfillCheckpoint(source=source, rows_written=0)
+            self.db.add(checkpoint)
+        if restart:
+            checkpoint.last_start_time = None
+            checkpoint.last_platform = None
+            checkpoint.last_id = None
+            checkpoint.rows_written = 0
+            checkpoint.completed_at = None
+        self.db.commit()
+        return checkpoint
+
+    @staticmethod
+    def _sort_key(contest: ContestCreate):
+        return (to_naive_utc(contest.start_time), contest.platform, contest.id)
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="過去のコンテストを履歴テーブルに取り込みます")
+    parser.add_argument("--source", action="append", help="取得元（atcoder, codeforces）。複数指定可。省略時はすべて")
+    parser.add_argument("--chunk-size", type=int, default=BACKFILL_CHUNK_SIZE, help="1回のコミットで書き込む件数")
+    parser.add_argument("--max-rows-per-sec", type=float, default=BACKFILL_MAX_ROWS_PER_SEC, help="書き込み速度の上限（0で無制限）")
+    parser.add_argument("--restart", action="store_true", help="チェックポイントを破棄して最初から取り込む")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        backfill = ContestBackfill(db, args.chunk_size, args.max_rows_per_sec)
+        results = await backfill.run(args.source, args.restart)
+        logger.info(f"Backfill finished: {results}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import os
+from sqlalchemy.orm import Session
+from sqlalchemy import func, text
+from app.models.contest import Contest
+from app.models.contest_change import ContestChange, ContestChangeWatermark
+from app.core.logger import logger
+
+# チェンジログの保持期間と最大件数
+CHANGE_LOG_RETENTION_DAYS = int(os.environ.get("CONTEST_CHANGE_RETENTION_DAYS", "14"))
+CHANGE_LOG_MAX_ROWS = int(os.environ.get("CONTEST_CHANGE_MAX_ROWS", "10000"))
+
+# 圧縮で削除した最大のシーケンス番号を保存するキー
+COMPACTED_WATERMARK = "compacted"
+# PostgreSQLでチェンジログへの追記を直列化するアドバイザリロックのキー
+CHANGE_LOG_LOCK_KEY = 7_263_001
+
+# 変更検知の対象となるフィールド
+TRACKED_FIELDS = ("title", "start_time", "duration_min", "url")
+
+def _serialize(value: Any) -> Any:
+    """JSONに保存できる形式に変換"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+class ContestChangeLog:
+    """
+    コンテストの変更（追加・更新・削除）をシーケンス番号付きで記録するチェンジログ。
+    シーケンス番号はflush時に採番されコミット時に見えるようになるため、
+    PostgreSQLでは追記するトランザクションをロックで直列化し、番号の順にコミットされるようにします。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.entries: List[ContestChange] = []
+
+    def record_insert(self, contest: Contest) -> None:
+        """コンテストの追加を記録"""
+        self._append(contest.id, contest.platform, "insert", {
+            field: _serialize(getattr(contest, field)) for field in TRACKED_FIELDS
+        })
+
+    def record_update(self, contest: Contest, changed: Dict[str, Any]) -> None:
+        """コンテストの更新を記録（変更されたフィールドのみ）"""
+        if not changed:
+            return
+        self._append(contest.id, contest.platform, "update", {
+            field: _serialize(value) for field, value in changed.items()
+        })
+
+    def record_delete(self, contest_id: str, platform: str) -> None:
+        """コンテストの削除を記録"""
+        self._append(contest_id, platform, "delete", None)
+
+    def _append(self, contest_id: str, platform: str, op: str, changes: Optional[Dict[str, Any]]) -> None:
+        # コミットは呼び出し元のトランザクションに任せる
+        if not self.entries:
+            self._lock()
+        entry = ContestChange(
+            contest_id=contest_id,
+            platform=platform,
+            op=op,
+            changes=changes
+        )
+        self.db.add(entry)
+        self.entries.append(entry)
+
+    def _lock(self) -> None:
+        """
+        複数のワーカーが同時に追記すると、小さいシーケンス番号が後からコミットされ、
+        since=最新の番号 で取得するクライアントが取りこぼすため、コミットまで追記を直列化する
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            self.db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CHANGE_LOG_LOCK_KEY})
+
+    def notifications(self) -> List[Dict[str, Any]]:
+        """
+        記録した変更をプッシュ配信用の簡潔な形式で返します。
+        シーケンス番号を確定させるため、flush後に呼び出してください。
+        """
+        return [
+            {
+                "seq": entry.seq,
+                "op": entry.op,
+                "platform": entry.platform,
+                "contest_id": entry.contest_id
+            }
+            for entry in self.entries
+        ]
+
+    def list_since(self, since: int, limit: int, platform: Optional[str] = None) -> Tuple[List[ContestChange], int, bool, bool]:
+        """
+        指定したシーケンス番号より後の変更を取得します。
+        戻り値: (変更一覧, 最新のシーケンス番号, 続きがあるか, 全件再取得が必要か)
+        """
+        max_seq = self.db.query(func.max(ContestChange.seq)).scalar()
+        compacted_seq = self._compacted_seq()
+        latest_seq = max(max_seq or 0, compacted_seq) or since
+
+        # 圧縮で削除された範囲を要求された場合は全件の再取得を促す
+        # （すべての変更が削除されてテーブルが空の場合も含む）
+        reset = since > 0 and since < compacted_seq
+
+        query = self.db.query(ContestChange).filter(ContestChange.seq > since)
+        if platform:
+            query = query.filter(ContestChange.platform == platform)
+        rows = query.order_by(ContestChange.seq).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if has_more:
+            latest_seq = rows[-1].seq
+        return rows, latest_seq, has_more, reset
+
+    def compact(self) -> int:
+        """
+        保持期間を過ぎた変更と、最大件数を超えた古い変更を削除します。
+        戻り値: 削除された件数
+        """
+        cutoff = datetime.utcnow() - timedelta(days=CHANGE_LOG_RETENTION_DAYS)
+        # 削除する範囲の最大のシーケンス番号を記録し、それより前から取得するクライアントに再取得を促す
+        watermark = self.db.query(func.max(ContestChange.seq)).filter(
+            ContestChange.changed_at < cutoff
+        ).scalar() or 0
+        deleted = self.db.query(ContestChange).filter(
+            ContestChange.changed_at < cutoff
+        ).delete(synchronize_session=False)
+
+        max_seq = self.db.query(func.max(ContestChange.seq)).scalar()
+        if max_seq is not None and max_seq > CHANGE_LOG_MAX_ROWS:
+            watermark = max(watermark, max_seq - CHANGE_LOG_MAX_ROWS)
+            deleted += self.db.query(ContestChange).filter(
+                ContestChange.seq <= max_seq - CHANGE_LOG_MAX_ROWS
+            ).delete(synchronize_session=False)
+
+        if deleted:
+            self._save_compacted_seq(watermark)
+            logger.info(f"Compacted contest change log: {deleted} entries removed")
+        return deleted
+
+    def _compacted_seq(self) -> int:
+        state = self.db.get(ContestChangeWatermark, COMPACTED_WATERMARK)
+        return state.seq if state else 0
+
+    def _save_compacted_seq(self, seq: int) -> None:
+        state = self.db.get(ContestChangeWatermark, COMPACTED_WATERMARK)
+        if state is None:
+            state = ContestChangeWatermark(name=COMPACTED_WATERMARK, seq=0)
+            self.db.add(state)
+        state.seq = max(state.seq or 0, seq)
+        state.updated_at = datetime.utcnow()
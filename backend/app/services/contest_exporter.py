@@ -0,0 +1,116 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Iterator, List, Optional, Sequence
+import msgpack
+from sqlalchemy import select, literal
+from app.core.database import SessionLocal
+from app.models.contest import Contest
+from app.models.contest_history import ContestHistory
+
+# サーバーサイドカーソルから一度に取得する件数
+EXPORT_BATCH_SIZE = int(os.environ.get("CONTEST_EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_COLUMNS = ["platform", "id", "title", "start_time", "duration_min", "url", "archived"]
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "msgpack": "application/x-msgpack",
+}
+
+class ContestExporter:
+    """
+    コンテストをバッチ単位でストリーミング出力するクラス。
+    行をすべてメモリに載せないため、テーブルの大きさに関わらずメモリ使用量は一定です。
+    """
+
+    def __init__(self, scope: str = "all", platforms: Optional[List[str]] = None):
+        self.scope = scope
+        self.platforms = platforms
+
+    def _statements(self, now: datetime):
+        def build(model, archived: bool, time_filter=None):
+            stmt = select(
+                model.platform, model.id, model.title, model.start_time,
+                model.duration_min, model.url, literal(archived).label("archived")
+            )
+            if time_filter is not None:
+                stmt = stmt.where(time_filter)
+            if self.platforms:
+                stmt = stmt.where(model.platform.in_(self.platforms))
+            return stmt.order_by(model.start_time)
+
+        if self.scope == "upcoming":
+            return [build(Contest, False, Contest.start_time >= now)]
+        if self.scope == "past":
+            return [
+                build(ContestHistory, True),
+                build(Contest, False, Contest.start_time < now),
+            ]
+        return [build(ContestHistory, True), build(Contest, False)]
+
+    def iter_batches(self) -> Iterator[Sequence[Any]]:
+        """
+        行をバッチ単位で返します（PostgreSQLではサーバーサイドカーソルを使用）。
+        履歴と contests の読み取りは REPEATABLE READ の1つのトランザクションで行うため、
+        途中でアーカイブが走ってもコンテストが重複したり欠けたりしません（SQLiteを除く）。
+        """
+        db = SessionLocal()
+        try:
+            if db.get_bind().dialect.name != "sqlite":
+                db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            now = datetime.utcnow()
+            for stmt in self._statements(now):
+                result = db.execute(
+                    stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+                )
+                for batch in result.partitions():
+                    yield batch
+        finally:
+            db.close()
+
+    def stream(self, format: str) -> Iterator[bytes]:
+        encoder = {
+            "ndjson": self._encode_ndjson,
+            "csv": self._encode_csv,
+            "msgpack": self._encode_msgpack,
+        }[format]
+        if format == "csv":
+            yield self._csv_line(EXPORT_COLUMNS)
+        for batch in self.iter_batches():
+            yield encoder(batch)
+
+    def _encode_ndjson(self, batch) -> bytes:
+        lines = []
+        for row in batch:
+            record = dict(zip(EXPORT_COLUMNS, row))
+            record["start_time"] = record["start_time"].isoformat()
+            lines.append(json.dumps(record, ensure_ascii=False))
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _csv_line(self, values) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue().encode("utf-8")
+
+    def _encode_csv(self, batch) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            values = list(row)
+            values[3] = values[3].isoformat()
+            writer.writerow(values)
+        return buffer.getvalue().encode("utf-8")
+
+    def _encode_msgpack(self, batch) -> bytes:
+        # 列指向でまとめる（開始時刻はUTCのUNIX秒）。msgpack.Unpacker で逐次読み出せる
+        columns = {name: [] for name in EXPORT_COLUMNS}
+        for row in batch:
+            for name, value in zip(EXPORT_COLUMNS, row):
+                if name == "start_time":
+                    value = int(value.replace(tzinfo=timezone.utc).timestamp())
+                columns[name].append(value)
+        return msgpack.packb({"rows": len(batch), "columns": columns})
@@ -1,23 +1,206 @@
 from datetime import datetime, timezone, timedelta
+import hashlib
+import json
+import os
 import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import re
+from sqlalchemy.orm import Session
 from app.schemas.contest import ContestCreate
+from app.schemas.source import SourceFetchResult
+from app.models.source_snapshot import SourceSnapshot
+from app.core.circuit_breaker import get_breaker
 from app.core.logger import logger
+from app.core.profiling import httpx_event_hooks
+
+# 外部APIのタイムアウト（秒）
+FETCH_TIMEOUT_SEC = float(os.environ.get("CONTEST_FETCH_TIMEOUT_SEC", "10"))
+
+# AtCoderのコンテストIDの接頭辞とプラットフォームの対応
+ATCODER_PLATFORMS = {
+    "abc": "atcoder",
+    "arc": "atcoder_regular",
+    "agc": "atcoder_grand",
+    "ahc": "atcoder_heuristic",
+}
+
+def _mock_mode() -> bool:
+    """テスト用にモックデータを返すかどうか（MOCK_CONTEST_API=true の場合のみ）"""
+    return os.environ.get("MOCK_CONTEST_API", "false").lower() == "true"
+
+def _content_hash(contests: List[ContestCreate]) -> str:
+    payload = sorted(
+        (c.model_dump(mode="json") for c in contests),
+        key=lambda c: (c["platform"], c["id"])
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
 
 class ContestFetcher:
-    def __init__(self):
+    def __init__(self, db: Optional[Session] = None):
         # AtCoder Problems API
         self.atcoder_problems_api_url = "https://kenkoooo.com/atcoder/resources/contests.json"
         self.codeforces_api_url = "https://codeforces.com/api/contest.list"
-    
-    async def fetch_atcoder_contests(self) -> List[ContestCreate]:
-        """AtCoderのコンテスト情報（モックデータ）を取得"""
-        # AtCoder Problems APIが一時停止中のため、モックデータのみを返す
-        logger.info("Using mock data for AtCoder contests (AtCoder Problems API is temporarily unavailable)")
+        # 最後に正常に取得できたデータの保存先（指定がなければ保存しない）
+        self.db = db
+        self.sources = {
+            "atcoder": self.fetch_atcoder_contests,
+            "codeforces": self.fetch_codeforces_contests,
+        }
+
+    async def fetch_atcoder_contests(self, include_past: bool = False) -> List[ContestCreate]:
+        """AtCoderのコンテスト情報を取得（include_past=True の場合は過去のコンテストも含む）"""
+        if _mock_mode():
+            return self._mock_atcoder_contests()
+
+        async with httpx.AsyncClient(timeout=FETCH_TIMEOUT_SEC, event_hooks=httpx_event_hooks()) as client:
+            response = await client.get(self.atcoder_problems_api_url)
+            response.raise_for_status()
+            data = response.json()
+
+        now = datetime.now(timezone.utc)
+        contests = []
+        for contest in data:
+            # 開始時間が未来のコンテストのみを取得
+            start_time = datetime.fromtimestamp(contest["start_epoch_second"], tz=timezone.utc)
+            if start_time <= now and not include_past:
+                continue
+
+            contests.append(ContestCreate(
+                id=contest["id"],
+                platform=ATCODER_PLATFORMS.get(contest["id"][:3], "atcoder"),
+                title=contest["title"],
+                start_time=start_time,
+                duration_min=contest["duration_second"] // 60,
+                url=f"https://atcoder.jp/contests/{contest['id']}"
+            ))
+        return contests
+
+    async def fetch_codeforces_contests(self, include_past: bool = False) -> List[ContestCreate]:
+        """Codeforcesのコンテスト情報を取得（include_past=True の場合は終了したコンテストも含む）"""
+        if _mock_mode():
+            return self._mock_codeforces_contests()
+
+        async with httpx.AsyncClient(timeout=FETCH_TIMEOUT_SEC, event_hooks=httpx_event_hooks()) as client:
+            response = await client.get(self.codeforces_api_url)
+            response.raise_for_status()
+            data = response.json()
+
+        if data["status"] != "OK":
+            raise Exception(f"Codeforces API error: {data['comment']}")
+
+        contests = []
+        for contest in data["result"]:
+            # 開始時刻が未定のコンテストは除外する
+            if "startTimeSeconds" not in contest:
+                continue
+
+            # 開始時間が未来のコンテストのみを取得
+            start_time = datetime.fromtimestamp(contest["startTimeSeconds"], tz=timezone.utc)
+            if start_time <= datetime.now(timezone.utc) and not include_past:
+                continue
+
+            # コンテストIDからプラットフォームを判定
+            platform = "codeforces"
+            if contest["type"] == "EDUCATIONAL":
+                platform = "codeforces_educational"
+
+            contests.append(ContestCreate(
+                id=str(contest["id"]),
+                platform=platform,
+                title=contest["name"],
+                start_time=start_time,
+                duration_min=contest["durationSeconds"] // 60,
+                url=f"https://codeforces.com/contests/{contest['id']}"
+            ))
+        return contests
+
+    async def fetch_source(self, source: str) -> SourceFetchResult:
+        """
+        サーキットブレーカーを通して取得元からコンテスト情報を取得します。
+        障害時やブレーカーが開いている間は、最後に正常に取得できたデータを返します。
+        """
+        if _mock_mode():
+            contests = await self.sources[source]()
+            return SourceFetchResult(source=source, status="fresh", contests=contests)
+
+        breaker = get_breaker(source)
+        if not breaker.allow():
+            logger.warning(f"Circuit breaker for {source} is open, using last known good snapshot")
+            return self._snapshot_result(source, "circuit open")
+
+        try:
+            contests = await self.sources[source]()
+        except Exception as e:
+            breaker.record_failure(e)
+            logger.error(f"Failed to fetch {source} contests: {str(e)}")
+            return self._snapshot_result(source, str(e))
+
+        breaker.record_success()
+
+        # 前回と同じ内容であればDBへの書き込みを省略できるようにする
+        content_hash = _content_hash(contests)
+        snapshot = self._load_snapshot(source)
+        if snapshot and snapshot.content_hash == content_hash:
+            return SourceFetchResult(source=source, status="unchanged", contests=contests)
+
+        self._save_snapshot(source, contests, content_hash)
+        return SourceFetchResult(source=source, status="fresh", contests=contests)
+
+    async def fetch_history(self, source: str) -> List[ContestCreate]:
+        """
+        バックフィル用に過去のコンテストを含むすべてのコンテストを取得します。
+        ブレーカーが開いている場合や取得に失敗した場合は例外を送出します。
+        """
+        breaker = get_breaker(source)
+        if not _mock_mode() and not breaker.allow():
+            raise Exception(f"Circuit breaker for {source} is open")
+        try:
+            contests = await self.sources[source](include_past=True)
+        except Exception as e:
+            breaker.record_failure(e)
+            raise
+        breaker.record_success()
+        return contests
+
+    async def fetch_all_sources(self) -> Dict[str, SourceFetchResult]:
+        """すべての取得元からコンテスト情報を取得"""
+        results = {}
+        for source in self.sources:
+            results[source] = await self.fetch_source(source)
+            logger.info(f"Fetched {len(results[source].contests)} {source} contests ({results[source].status})")
+        return results
+
+    async def fetch_all_contests(self) -> List[ContestCreate]:
+        """すべてのプラットフォームからコンテスト情報を取得"""
+        results = await self.fetch_all_sources()
+        return [contest for result in results.values() for contest in result.contests]
+
+    def _load_snapshot(self, source: str) -> Optional[SourceSnapshot]:
+        if self.db is None:
+            return None
+        return self.db.get(SourceSnapshot, source)
+
+    def _save_snapshot(self, source: str, contests: List[ContestCreate], content_hash: str) -> None:
+        # コミットは呼び出し元のトランザクションに任せる
+        if self.db is None:
+            return
+        snapshot = self._load_snapshot(source)
+        if snapshot is None:
+            snapshot = SourceSnapshot(source=source)
+            self.db.add(snapshot)
+        snapshot.payload = [c.model_dump(mode="json") for c in contests]
+        snapshot.content_hash = content_hash
+        snapshot.contest_count = len(contests)
+        snapshot.fetched_at = datetime.utcnow()
+
+    def _snapshot_result(self, source: str, error: str) -> SourceFetchResult:
+        snapshot = self._load_snapshot(source)
+        contests = [ContestCreate(**c) for c in snapshot.payload] if snapshot else []
+        return SourceFetchResult(source=source, status="snapshot", contests=contests, error=error)
+
+    def _mock_atcoder_contests(self) -> List[ContestCreate]:
+        """AtCoderのコンテスト情報（テスト用のモックデータ）"""
         now = datetime.now(timezone.utc)
-        
-        # 今後のコンテスト情報（モックデータ）
         return [
             ContestCreate(
                 id="abc407",
@@ -25,7 +208,8 @@ class ContestFetcher:
                 title="AtCoder Beginner Contest 407",
                 start_time=now + timedelta(days=7),
                 duration_min=100,
-                url="https://atcoder.jp/contests/abc407"
+                url="https://atcoder.jp/contests/abc407",
+                source="mock"
             ),
             ContestCreate(
                 id="arc198",
@@ -33,7 +217,8 @@ class ContestFetcher:
                 title="AtCoder Regular Contest 198 (Div. 2)",
                 start_time=now + timedelta(days=8),
                 duration_min=120,
-                url="https://atcoder.jp/contests/arc198"
+                url="https://atcoder.jp/contests/arc198",
+                source="mock"
             ),
             ContestCreate(
                 id="ahc047",
@@ -41,7 +226,8 @@ class ContestFetcher:
                 title="Toyota Programming Contest 2025#2（AtCoder Heuristic Contest 047）",
                 start_time=now + timedelta(days=1),
                 duration_min=240,
-                url="https://atcoder.jp/contests/ahc047"
+                url="https://atcoder.jp/contests/ahc047",
+                source="mock"
             ),
             ContestCreate(
                 id="abc410",
@@ -49,7 +235,8 @@ class ContestFetcher:
                 title="AtCoder Beginner Contest 410",
                 start_time=now + timedelta(days=28),
                 duration_min=100,
-                url="https://atcoder.jp/contests/abc410"
+                url="https://atcoder.jp/contests/abc410",
+                source="mock"
             ),
             ContestCreate(
                 id="agc073",
@@ -57,81 +244,31 @@ class ContestFetcher:
                 title="AtCoder Grand Contest 073",
                 start_time=now + timedelta(days=35),
                 duration_min=180,
-                url="https://atcoder.jp/contests/agc073"
+                url="https://atcoder.jp/contests/agc073",
+                source="mock"
             )
         ]
 
-    async def fetch_codeforces_contests(self) -> List[ContestCreate]:
-        """Codeforcesのコンテスト情報を取得"""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self.codeforces_api_url)
-                response.raise_for_status()
-                data = response.json()
-
-                if data["status"] != "OK":
-                    raise Exception(f"Codeforces API error: {data['comment']}")
-
-                contests = []
-                for contest in data["result"]:
-                    # 開始時間が未来のコンテストのみを取得
-                    start_time = datetime.fromtimestamp(contest["startTimeSeconds"], tz=timezone.utc)
-                    if start_time <= datetime.now(timezone.utc):
-                        continue
-
-                    # コンテストIDからプラットフォームを判定
-                    platform = "codeforces"
-                    if contest["type"] == "EDUCATIONAL":
-                        platform = "codeforces_educational"
-
-                    contests.append(ContestCreate(
-                        id=str(contest["id"]),
-                        platform=platform,
-                        title=contest["name"],
-                        start_time=start_time,
-                        duration_min=contest["durationSeconds"] // 60,
-                        url=f"https://codeforces.com/contests/{contest['id']}"
-                    ))
-                return contests
-        except Exception as e:
-            logger.error(f"Failed to fetch Codeforces contests: {str(e)}")
-            
-            # エラー時はモックデータを返す
-            now = datetime.now(timezone.utc)
-            return [
-                ContestCreate(
-                    id="1888",
-                    platform="codeforces",
-                    title="Codeforces Round 999 (Div. 2)",
-                    start_time=now + timedelta(days=3),
-                    duration_min=120,
-                    url="https://codeforces.com/contests/1888"
-                ),
-                ContestCreate(
-                    id="1889",
-                    platform="codeforces_educational",
-                    title="Educational Codeforces Round 170",
-                    start_time=now + timedelta(days=10),
-                    duration_min=120,
-                    url="https://codeforces.com/contests/1889"
-                )
-            ]
-
-    async def fetch_all_contests(self) -> List[ContestCreate]:
-        """すべてのプラットフォームからコンテスト情報を取得"""
-        atcoder_contests = []
-        codeforces_contests = []
-        
-        try:
-            atcoder_contests = await self.fetch_atcoder_contests()
-            logger.info(f"Successfully fetched {len(atcoder_contests)} AtCoder contests")
-        except Exception as e:
-            logger.error(f"Failed to fetch AtCoder contests: {str(e)}")
-        
-        try:
-            codeforces_contests = await self.fetch_codeforces_contests()
-            logger.info(f"Successfully fetched {len(codeforces_contests)} Codeforces contests")
-        except Exception as e:
-            logger.error(f"Failed to fetch Codeforces contests: {str(e)}")
-        
-        return atcoder_contests + codeforces_contests 
+    def _mock_codeforces_contests(self) -> List[ContestCreate]:
+        """Codeforcesのコンテスト情報（テスト用のモックデータ）"""
+        now = datetime.now(timezone.utc)
+        return [
+            ContestCreate(
+                id="1888",
+                platform="codeforces",
+                title="Codeforces Round 999 (Div. 2)",
+                start_time=now + timedelta(days=3),
+                duration_min=120,
+                url="https://codeforces.com/contests/1888",
+                source="mock"
+            ),
+            ContestCreate(
+                id="1889",
+                platform="codeforces_educational",
+                title="Educational Codeforces Round 170",
+                start_time=now + timedelta(days=10),
+                duration_min=120,
+                url="https://codeforces.com/contests/1889",
+                source="mock"
+            )
+        ]
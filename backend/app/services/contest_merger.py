@@ -0,0 +1,145 @@
+import hashlib
+import re
+import unicodedata
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+from app.models.contest import Contest
+from app.schemas.contest import ContestCreate
+from app.core.timeutil import to_naive_utc
+
+# 取得元の優先度（小さいほど優先）。同じコンテストが複数の取得元から届いた場合に使用
+SOURCE_PRIORITY = {
+    "native": 0,       # 各OJの公式API
+    "aggregator": 10,  # 複数OJをまとめたAPI
+    "mock": 100,       # テスト用のモックデータ
+}
+
+# フィールドごとの取得元の優先度（指定がなければ SOURCE_PRIORITY に従う）
+FIELD_SOURCE_PRIORITY = {
+    # 開始時刻と長さは公式の情報を優先し、集約サイトの丸められた値で上書きしない
+    "start_time": ["native", "aggregator", "mock"],
+    "duration_min": ["native", "aggregator", "mock"],
+}
+
+MERGED_FIELDS = ("id", "platform", "title", "start_time", "duration_min", "url")
+
+# 同じコンテストを指す別のURL表記
+_URL_PATH_ALIASES = [
+    (re.compile(r"^/contests/(\d+)$"), r"/contest/\1"),  # Codeforces
+]
+
+def canonical_url(url: str) -> str:
+    """表記揺れを除いたURLを返します（スキーム・www・末尾スラッシュ・クエリを無視）"""
+    parts = urlsplit(str(url).strip())
+    host = parts.netloc.lower()
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    path = re.sub(r"/+", "/", parts.path).rstrip("/")
+    for pattern, replacement in _URL_PATH_ALIASES:
+        path = pattern.sub(replacement, path)
+    return f"https://{host}{path}"
+
+def canonical_title(title: str) -> str:
+    """全角・半角や大文字・小文字、記号の違いを除いたタイトルを返します"""
+    normalized = unicodedata.normalize("NFKC", title).casefold()
+    normalized = re.sub(r"[^\w]+", " ", normalized)
+    return " ".join(normalized.split())
+
+def _hash(value: str) -> str:
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+def url_fingerprint(url: str) -> str:
+    return "url:" + _hash(canonical_url(url))
+
+def title_fingerprint(title: str, start_time: datetime) -> str:
+    # 開始時刻は分単位に丸める
+    start = to_naive_utc(start_time).replace(second=0, microsecond=0)
+    return "title:" + _hash(f"{canonical_title(title)}|{start.isoformat()}")
+
+def _priority(source: str, field: Optional[str] = None) -> int:
+    order = FIELD_SOURCE_PRIORITY.get(field)
+    if order and source in order:
+        return order.index(source)
+    return SOURCE_PRIORITY.get(source, 50)
+
+class ContestMerger:
+    """
+    複数の取得元から届いたコンテストをフィンガープリントで重複排除・統合し、
+    既存のコンテストとハッシュ結合で突き合わせるクラス
+    """
+
+    def merge(self, contests: Iterable[ContestCreate]) -> List[ContestCreate]:
+        """
+        同じコンテストを指すデータを1件に統合します。
+        (platform, id) またはURLのフィンガープリントが一致するものを同一とみなし、
+        「タイトル+開始時刻」のフィンガープリントは異なる取得元のデータ同士でのみ同一とみなします。
+        一致は推移的に扱います（A と B がURLで、B と C がタイトルで一致すれば3件を統合）。
+        """
+        contests = list(contests)
+        parent = list(range(len(contests)))
+        # 各グループ（代表の添字）に含まれる取得元
+        sources = [{contest.source} for contest in contests]
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i: int, j: int) -> None:
+            i, j = find(i), find(j)
+            if i != j:
+                parent[max(i, j)] = min(i, j)
+                sources[min(i, j)] |= sources[max(i, j)]
+
+        first_by_key: Dict[str, int] = {}
+        for i, contest in enumerate(contests):
+            for key in (f"key:{contest.platform}:{contest.id}", url_fingerprint(str(contest.url))):
+                if key in first_by_key:
+                    union(first_by_key[key], i)
+                else:
+                    first_by_key[key] = i
+
+        # 同じ取得元の同名のコンテスト（同時刻の別部門など）は統合しない
+        by_title: Dict[str, List[int]] = {}
+        for i, contest in enumerate(contests):
+            by_title.setdefault(title_fingerprint(contest.title, contest.start_time), []).append(i)
+        for indexes in by_title.values():
+            for i in indexes[1:]:
+                root, other = find(indexes[0]), find(i)
+                if root != other and not (sources[root] & sources[other]):
+                    union(root, other)
+
+        groups: Dict[int, List[ContestCreate]] = {}
+        for i, contest in enumerate(contests):
+            groups.setdefault(find(i), []).append(contest)
+        return [self._merge_group(group) for group in groups.values()]
+
+    def _merge_group(self, group: List[ContestCreate]) -> ContestCreate:
+        if len(group) == 1:
+            return group[0]
+        values = {}
+        for field in MERGED_FIELDS:
+            # id と platform は同じ取得元から採用する
+            rank_field = "id" if field == "platform" else field
+            best = min(group, key=lambda c: _priority(c.source, rank_field))
+            values[field] = getattr(best, field)
+        values["source"] = min(group, key=lambda c: _priority(c.source)).source
+        return ContestCreate(**values)
+
+    def build_index(self, existing: Iterable[Contest]) -> Dict[str, Contest]:
+        """既存のコンテストを (platform, id) とURLのフィンガープリントで引けるようにします"""
+        index: Dict[str, Contest] = {}
+        for contest in existing:
+            index[f"key:{contest.platform}:{contest.id}"] = contest
+            index.setdefault(url_fingerprint(contest.url), contest)
+        return index
+
+    def match(self, index: Dict[str, Contest], contest: ContestCreate) -> Optional[Contest]:
+        """統合済みのコンテストに対応する既存のコンテストを返します"""
+        return (
+            index.get(f"key:{contest.platform}:{contest.id}")
+            or index.get(url_fingerprint(str(contest.url)))
+        )
@@ -0,0 +1,92 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, literal, or_
+from app.models.contest import Contest
+from app.models.contest_history import ContestHistory
+
+def _like_pattern(term: str) -> str:
+    """LIKE のワイルドカードをエスケープして部分一致パターンを作成"""
+    escaped = term.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+    return f"%{escaped}%"
+
+class ContestSearch:
+    """
+    コンテスト名の検索を行うサービスクラス。
+    PostgreSQLでは pg_trgm のトライグラムインデックスを使った曖昧検索とランキングを行い、
+    それ以外のデータベースでは部分一致による検索にフォールバックします。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.use_trigram = db.bind.dialect.name == "postgresql"
+
+    def search(
+        self,
+        q: str,
+        platforms: Optional[List[str]] = None,
+        scope: str = "upcoming",
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        タイトルでコンテストを検索し、関連度の高い順に返します。
+        scope: upcoming（今後）/ past（過去、アーカイブを含む）/ all
+        """
+        terms = q.split()
+        if not terms:
+            return []
+
+        now = datetime.utcnow()
+        results: List[Dict[str, Any]] = []
+
+        if scope in ("upcoming", "all"):
+            results += self._search_table(Contest, q, terms, platforms, limit, Contest.start_time >= now, False)
+        if scope in ("past", "all"):
+            # アーカイブ前の直近のコンテストも過去のコンテストとして扱う
+            results += self._search_table(Contest, q, terms, platforms, limit, Contest.start_time < now, False)
+            results += self._search_table(ContestHistory, q, terms, platforms, limit, None, True)
+
+        # 各テーブルの上位結果をマージ（同じ関連度なら開始時刻が近い順）
+        results.sort(key=lambda r: (-r["rank"], abs((r["start_time"] - now).total_seconds())))
+        return results[:limit]
+
+    def _search_table(self, model, q, terms, platforms, limit, time_filter, archived) -> List[Dict[str, Any]]:
+        title = model.title
+        # すべての単語を含むタイトルに一致させる（トライグラムインデックスが利用される）
+        matches_all = and_(*[title.ilike(_like_pattern(term), escape="!") for term in terms])
+
+        if self.use_trigram:
+            # 表記揺れにも一致させるため単語類似度（<% 演算子）による一致も許可する
+            condition = or_(matches_all, literal(q).op("<%")(title))
+            rank = func.word_similarity(q, title)
+        else:
+            lowered = func.lower(title)
+            q_lower = q.lower()
+            condition = matches_all
+            rank = case(
+                (lowered == q_lower, 1.0),
+                (lowered.like(q_lower + "%"), 0.8),
+                (lowered.like(_like_pattern(q_lower), escape="!"), 0.6),
+                else_=0.4
+            )
+
+        query = self.db.query(model, rank.label("rank")).filter(condition)
+        if time_filter is not None:
+            query = query.filter(time_filter)
+        if platforms:
+            query = query.filter(model.platform.in_(platforms))
+
+        rows = query.order_by(rank.desc(), model.start_time.desc()).limit(limit).all()
+        return [
+            {
+                "id": contest.id,
+                "platform": contest.platform,
+                "title": contest.title,
+                "start_time": contest.start_time,
+                "duration_min": contest.duration_min,
+                "url": contest.url,
+                "archived": archived,
+                "rank": float(rank_value or 0)
+            }
+            for contest, rank_value in rows
+        ]
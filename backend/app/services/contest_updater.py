@@ -1,14 +1,27 @@
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.models.contest import Contest
 from app.services.contest_fetcher import ContestFetcher
+from app.services.contest_archiver import ContestArchiver
+from app.services.contest_change_log import ContestChangeLog
+from app.services.contest_merger import ContestMerger
+from app.services.interval_index import interval_index
+from app.core.broadcaster import broadcaster
+from app.core.database import SessionLocal
+from app.core.single_flight import update_flight
 from app.core.logger import logger
+from app.core.timeutil import to_naive_utc
 
 class ContestUpdater:
     def __init__(self, db: Session):
         self.db = db
-        self.fetcher = ContestFetcher()
+        self.fetcher = ContestFetcher(db)
+        self.change_log = ContestChangeLog(db)
+        self.merger = ContestMerger()
+        # 直前の update_contests でアーカイブに失敗した場合のエラー
+        self.archive_error: Optional[str] = None
 
     async def update_contests(self) -> tuple[int, int]:
         """
@@ -17,27 +30,42 @@ class ContestUpdater:
         """
         try:
             # 外部APIからコンテスト情報を取得
-            new_contests = await self.fetcher.fetch_all_contests()
+            # 前回から変化のない取得元や、障害で前回のデータを使っている取得元は書き込みを省略する
+            results = await self.fetcher.fetch_all_sources()
+            new_contests = [
+                contest for result in results.values() if result.status == "fresh"
+                for contest in result.contests
+            ]
             
             updated_count = 0
             skipped_count = 0
 
-            for contest_data in new_contests:
+            # 取得元をまたいだ重複を統合し、既存のコンテストと一度のクエリで突き合わせる
+            merged_contests = self.merger.merge(new_contests)
+            existing_index = self.merger.build_index(self.db.query(Contest).all())
+
+            for contest_data in merged_contests:
                 # HttpUrlをstrに変換
                 url_str = str(contest_data.url)
-                
-                # 既存のコンテストを検索
-                existing_contest = self.db.query(Contest).filter(
-                    Contest.id == contest_data.id,
-                    Contest.platform == contest_data.platform
-                ).first()
+                start_time = to_naive_utc(contest_data.start_time)
+
+                existing_contest = self.merger.match(existing_index, contest_data)
 
                 if existing_contest:
-                    # 既存のコンテストの情報を更新
-                    existing_contest.title = contest_data.title
-                    existing_contest.start_time = contest_data.start_time
-                    existing_contest.duration_min = contest_data.duration_min
-                    existing_contest.url = url_str
+                    # 既存のコンテストの情報を更新（変更されたフィールドのみ記録）
+                    new_values = {
+                        "title": contest_data.title,
+                        "start_time": start_time,
+                        "duration_min": contest_data.duration_min,
+                        "url": url_str
+                    }
+                    changed = {
+                        field: value for field, value in new_values.items()
+                        if getattr(existing_contest, field) != value
+                    }
+                    for field, value in changed.items():
+                        setattr(existing_contest, field, value)
+                    self.change_log.record_update(existing_contest, changed)
                     updated_count += 1
                 else:
                     # 新しいコンテストを追加
@@ -45,34 +73,63 @@ class ContestUpdater:
                         id=contest_data.id,
                         platform=contest_data.platform,
                         title=contest_data.title,
-                        start_time=contest_data.start_time,
+                        start_time=start_time,
                         duration_min=contest_data.duration_min,
                         url=url_str
                     )
                     self.db.add(new_contest)
+                    self.change_log.record_insert(new_contest)
                     updated_count += 1
 
-            # 古いコンテストを削除（終了後1週間経過したもの）
-            one_week_ago = datetime.now(timezone.utc) - timedelta(days=7)
-            # SQLAlchemyでは日時計算を直接行わず、日時比較のみを行う
-            old_contests = self.db.query(Contest).filter(
-                Contest.start_time < one_week_ago
-            ).all()
-            for contest in old_contests:
-                self.db.delete(contest)
-                skipped_count += 1
+            # チェンジログが肥大化しないよう古い変更を削除
+            self.change_log.compact()
 
+            # シーケンス番号を確定させてからコミットし、購読者に変更を通知
+            self.db.flush()
+            notifications = self.change_log.notifications()
             self.db.commit()
-            logger.info(
-                "Contest update completed",
-                extra={
-                    "updated": updated_count,
-                    "skipped": skipped_count
-                }
-            )
-            return updated_count, skipped_count
+            broadcaster.publish(notifications)
+            interval_index.invalidate()
 
         except Exception as e:
             self.db.rollback()
             logger.error("Failed to update contests", extra={"error": str(e)})
-            raise 
+            raise
+
+        # 開始から1週間経過したコンテストは削除せず履歴テーブルへ移動
+        # 更新はコミット済みのため、アーカイブに失敗しても更新の失敗としては扱わない
+        try:
+            skipped_count = ContestArchiver(self.db).archive()
+        except Exception as e:
+            self.archive_error = str(e)
+            skipped_count = 0
+
+        logger.info(
+            "Contest update completed",
+            extra={
+                "updated": updated_count,
+                "skipped": skipped_count
+            }
+        )
+        return updated_count, skipped_count
+
+async def run_contest_update(force: bool = False) -> tuple[int, int, Optional[str], Dict[str, Any]]:
+    """
+    専用のセッションでコンテストデータを更新します。
+    スケジューラーと管理者APIの同時実行は1回の更新にまとめられます。
+    force を指定した場合は、最小実行間隔内でも前回の結果を再利用せずに更新します。
+    戻り値: (更新されたコンテスト数, アーカイブされたコンテスト数, アーカイブのエラー,
+            再利用・まとめの有無と実行の完了日時)
+    """
+    async def update() -> tuple[int, int, Optional[str]]:
+        # 呼び出し元のリクエストが先に終了しても使えるよう、実行ごとにセッションを作る
+        db = SessionLocal()
+        try:
+            updater = ContestUpdater(db)
+            updated, skipped = await updater.update_contests()
+            return updated, skipped, updater.archive_error
+        finally:
+            db.close()
+
+    (updated, skipped, archive_error), flight = await update_flight.run_detailed("update", update, force=force)
+    return updated, skipped, archive_error, flight
@@ -0,0 +1,153 @@
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import os
+from sqlalchemy.orm import Session
+from app.models.contest import Contest
+from app.core.logger import logger
+
+# インデックスを再構築する間隔（秒）。更新時には即座に無効化される
+INDEX_REFRESH_SEC = int(os.environ.get("INTERVAL_INDEX_REFRESH_SEC", "300"))
+
+# (開始時刻, 終了時刻, コンテスト情報)
+Interval = Tuple[datetime, datetime, Dict[str, Any]]
+
+class _Node:
+    """中心点を含む区間を保持する区間木のノード"""
+
+    def __init__(self, center: datetime, intervals: List[Interval]):
+        self.center = center
+        self.by_start = sorted(intervals, key=lambda i: i[0])
+        self.by_end = sorted(intervals, key=lambda i: i[1], reverse=True)
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+def _build(intervals: List[Interval]) -> Optional[_Node]:
+    if not intervals:
+        return None
+    starts = sorted(i[0] for i in intervals)
+    center = starts[len(starts) // 2]
+
+    # 区間は半開区間 [start, end) として扱う
+    left = [i for i in intervals if i[1] <= center]
+    right = [i for i in intervals if i[0] > center]
+    node = _Node(center, [i for i in intervals if i[0] <= center < i[1]])
+    node.left = _build(left)
+    node.right = _build(right)
+    return node
+
+class ContestIntervalIndex:
+    """
+    コンテストの開催期間に対する区間木。
+    重なるコンテストの検索を O(log n + k) で行います。
+    """
+
+    def __init__(self, contests: List[Contest]):
+        intervals = []
+        for contest in contests:
+            start = contest.start_time
+            # 長さ0の区間は扱えないため最低1分とする
+            end = start + timedelta(minutes=max(contest.duration_min, 1))
+            intervals.append((start, end, {
+                "id": contest.id,
+                "platform": contest.platform,
+                "title": contest.title,
+                "start_time": contest.start_time,
+                "duration_min": contest.duration_min,
+                "url": contest.url,
+                "created_at": contest.created_at
+            }))
+        self.size = len(intervals)
+        self.root = _build(intervals)
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Interval]:
+        """[start, end) と重なる区間を開始時刻順に返します"""
+        results: List[Interval] = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if end <= node.center:
+                # 中心より左側のみ: 開始時刻が end より前の区間が重なる
+                for interval in node.by_start:
+                    if interval[0] >= end:
+                        break
+                    results.append(interval)
+                stack.append(node.left)
+            elif start > node.center:
+                # 中心より右側のみ: 終了時刻が start より後の区間が重なる
+                for interval in node.by_end:
+                    if interval[1] <= start:
+                        break
+                    results.append(interval)
+                stack.append(node.right)
+            else:
+                # 中心を含む: ノードの区間はすべて重なる
+                results.extend(node.by_start)
+                stack.append(node.left)
+                stack.append(node.right)
+        results.sort(key=lambda i: i[0])
+        return results
+
+    def conflicts(self, start: datetime, end: datetime, platforms: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """指定した期間と重なるコンテストを返します"""
+        return [
+            contest for _, _, contest in self.overlapping(start, end)
+            if not platforms or contest["platform"] in platforms
+        ]
+
+    def free_slots(
+        self,
+        start: datetime,
+        end: datetime,
+        min_duration_min: int = 0,
+        platforms: Optional[List[str]] = None
+    ) -> List[Tuple[datetime, datetime]]:
+        """指定した期間のうち、どのコンテストとも重ならない時間帯を返します"""
+        slots = []
+        cursor = start
+        for busy_start, busy_end, contest in self.overlapping(start, end):
+            if platforms and contest["platform"] not in platforms:
+                continue
+            if busy_start > cursor:
+                slots.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+        if cursor < end:
+            slots.append((cursor, end))
+
+        min_length = timedelta(minutes=min_duration_min)
+        return [(s, e) for s, e in slots if e - s >= min_length]
+
+class IntervalIndexCache:
+    """
+    今後のコンテストから構築した区間木を保持し、必要に応じて再構築します
+    """
+
+    def __init__(self):
+        self.index: Optional[ContestIntervalIndex] = None
+        self.built_at = 0.0
+
+    def invalidate(self) -> None:
+        """コンテストの更新後に呼び出し、次回のアクセス時に再構築させる"""
+        self.index = None
+
+    def get(self, db: Session) -> ContestIntervalIndex:
+        if self.index is None or time.monotonic() - self.built_at > INDEX_REFRESH_SEC:
+            self.index = self._build(db)
+            self.built_at = time.monotonic()
+        return self.index
+
+    def _build(self, db: Session) -> ContestIntervalIndex:
+        now = datetime.utcnow()
+        # 開催中のコンテストも含めるため、終了時刻が現在以降のものを対象とする
+        contests = [
+            contest for contest in db.query(Contest).all()
+            if contest.start_time + timedelta(minutes=contest.duration_min) > now
+        ]
+        index = ContestIntervalIndex(contests)
+        logger.info(f"Built contest interval index with {index.size} contests")
+        return index
+
+# プロセス内で共有する区間インデックス
+interval_index = IntervalIndexCache()
@@ -0,0 +1,126 @@
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+from app.models.setting import Setting
+from app.schemas.setting import SettingCreate
+from app.core.logger import logger
+
+# 設定がないプラットフォームに適用するデフォルト（DBには保存しない）
+DEFAULT_PLATFORMS = ["atcoder", "codeforces", "omc"]
+DEFAULT_NOTIFY_BEFORE_MIN = 30
+
+# 別プロセスでの更新を反映するまでの最大秒数と、キャッシュするユーザー数の上限
+SETTINGS_CACHE_TTL_SEC = float(os.environ.get("SETTINGS_CACHE_TTL_SEC", "60"))
+SETTINGS_CACHE_MAX_USERS = int(os.environ.get("SETTINGS_CACHE_MAX_USERS", "10000"))
+
+def platform_family(platform: str) -> str:
+    """コンテストのプラットフォーム（atcoder_regular など）を設定の単位（atcoder）に変換"""
+    return platform.split("_", 1)[0]
+
+class UserSettings:
+    """1ユーザー分の設定（保存済みの設定とデフォルトを合わせたもの）"""
+
+    def __init__(self, user_id: Optional[str], rows: List[Setting]):
+        self.user_id = user_id
+        saved = {row.platform: row for row in rows}
+        self.settings: List[Dict] = []
+        for platform in DEFAULT_PLATFORMS + sorted(set(saved) - set(DEFAULT_PLATFORMS)):
+            row = saved.get(platform)
+            self.settings.append({
+                "id": row.id if row else None,
+                "platform": platform,
+                "notify_before_min": row.notify_before_min if row else DEFAULT_NOTIFY_BEFORE_MIN,
+                "enabled": row.enabled if row else True
+            })
+        self.disabled_platforms = {s["platform"] for s in self.settings if not s["enabled"]}
+
+    def is_enabled(self, platform: str) -> bool:
+        return platform_family(platform) not in self.disabled_platforms
+
+    def platform_filter(self, column):
+        """無効にしたプラットフォームのコンテストを除外する条件（すべて有効なら None）"""
+        conditions = []
+        for family in sorted(self.disabled_platforms):
+            conditions.append(column != family)
+            conditions.append(~column.like(f"{family}!_%", escape="!"))
+        return and_(*conditions) if conditions else None
+
+class UserSettingsCache:
+    """
+    ユーザーごとの設定の読み取りキャッシュ。
+    同じプロセスでの更新時には即座に破棄し、別プロセスでの更新は TTL の経過で反映します。
+    """
+
+    def __init__(self, ttl_sec: float = SETTINGS_CACHE_TTL_SEC, max_users: int = SETTINGS_CACHE_MAX_USERS):
+        self.ttl_sec = ttl_sec
+        self.max_users = max_users
+        self.entries: "OrderedDict[str, Tuple[float, UserSettings]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, user_id: Optional[str]) -> UserSettings:
+        """ユーザーの設定を返します（未認証のユーザーにはDBを参照せずデフォルト設定を返す）"""
+        if user_id is None:
+            return DEFAULT_SETTINGS
+        entry = self.entries.get(user_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_sec:
+            self.hits += 1
+            self.entries.move_to_end(user_id)
+            return entry[1]
+
+        self.misses += 1
+        rows = db.query(Setting).filter(Setting.user_id == user_id).all()
+        settings = UserSettings(user_id, rows)
+        self.entries[user_id] = (time.monotonic(), settings)
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_users:
+            self.entries.popitem(last=False)
+        return settings
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        if user_id is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(user_id, None)
+
+    def update(self, db: Session, user_id: str, changes: List[SettingCreate]) -> UserSettings:
+        """
+        複数プラットフォームの設定を1つのトランザクションで更新し、更新後の設定を返します。
+        """
+        try:
+            platforms = [change.platform for change in changes]
+            existing = {
+                row.platform: row
+                for row in db.query(Setting).filter(
+                    Setting.user_id == user_id, Setting.platform.in_(platforms)
+                ).all()
+            }
+            now = datetime.utcnow()
+            for change in changes:
+                row = existing.get(change.platform)
+                if row is None:
+                    row = Setting(user_id=user_id, platform=change.platform)
+                    db.add(row)
+                    existing[change.platform] = row
+                row.notify_before_min = change.notify_before_min
+                row.enabled = change.enabled
+                row.updated_at = now
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            self.invalidate(user_id)
+
+        logger.info(f"Updated {len(changes)} settings for user {user_id}")
+        return self.get(db, user_id)
+
+# 未認証のユーザーに返すデフォルト設定
+DEFAULT_SETTINGS = UserSettings(None, [])
+
+# プロセス内で共有する設定キャッシュ
+user_settings = UserSettingsCache()
@@ -0,0 +1,89 @@
+"""
+コンテストの重なり検索のベンチマーク。
+
+区間木（ContestIntervalIndex）と、全コンテストを1件ずつ比較する単純な走査とで、
+ランダムな期間に対する重なり検索の速度を比較し、結果が一致することを確認します。
+
+使い方（backend ディレクトリで実行。DBには接続しません）:
+    python scripts/interval_benchmark.py --contests 1000 10000 100000 --queries 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# モデルの読み込みで app.core.database のエンジンが作られるため、DBドライバが不要なSQLiteを指定する
+# （エンジンは作成されるだけで接続はしない。インメモリのURLは接続プールの設定と両立しないためファイルを指定）
+os.environ["DATABASE_URL"] = f"sqlite:///{os.devnull}"
+
+from app.services.interval_index import ContestIntervalIndex  # noqa: E402
+
+PLATFORMS = ["atcoder", "atcoder_regular", "codeforces", "codeforces_educational"]
+
+def _contests(count: int, base: datetime, rng: random.Random) -> List[SimpleNamespace]:
+    # 1年間に分布させ、長さは 30分〜10日（長時間のヒューリスティックコンテストを含む）
+    return [
+        SimpleNamespace(
+            id=str(i),
+            platform=rng.choice(PLATFORMS),
+            title=f"Contest {i}",
+            start_time=base + timedelta(minutes=rng.randrange(0, 365 * 24 * 60)),
+            duration_min=rng.choice([30, 90, 100, 120, 150, 180, 240, 14400]),
+            url=f"https://example.com/{i}",
+            created_at=base
+        )
+        for i in range(count)
+    ]
+
+def _pairwise(contests, start: datetime, end: datetime):
+    results = []
+    for contest in contests:
+        contest_end = contest.start_time + timedelta(minutes=max(contest.duration_min, 1))
+        if contest.start_time < end and contest_end > start:
+            results.append((contest.platform, contest.id))
+    return sorted(results)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="区間木と単純な走査による重なり検索の比較")
+    parser.add_argument("--contests", type=int, nargs="+", default=[1000, 10000, 100000], help="コンテスト数（複数指定可）")
+    parser.add_argument("--queries", type=int, default=2000, help="検索回数")
+    parser.add_argument("--window-hours", type=int, default=24, help="検索する期間の長さ（時間）")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base = datetime(2025, 1, 1)
+    print(f"{'contests':>9} {'build ms':>9} {'index us/q':>11} {'scan us/q':>10} {'speedup':>8} {'avg hits':>9}")
+    for count in args.contests:
+        contests = _contests(count, base, rng)
+        windows = []
+        for _ in range(args.queries):
+            start = base + timedelta(minutes=rng.randrange(0, 365 * 24 * 60))
+            windows.append((start, start + timedelta(hours=args.window_hours)))
+
+        started = time.perf_counter()
+        index = ContestIntervalIndex(contests)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        indexed = [index.conflicts(s, e) for s, e in windows]
+        index_us = (time.perf_counter() - started) / len(windows) * 1e6
+
+        started = time.perf_counter()
+        scanned = [_pairwise(contests, s, e) for s, e in windows]
+        scan_us = (time.perf_counter() - started) / len(windows) * 1e6
+
+        for found, expected in zip(indexed, scanned):
+            if sorted((c["platform"], c["id"]) for c in found) != expected:
+                raise SystemExit("interval index returned different results from the pairwise scan")
+
+        hits = sum(len(r) for r in scanned) / len(scanned)
+        print(f"{count:>9} {build_ms:>9.1f} {index_us:>11.1f} {scan_us:>10.1f} {scan_us / index_us:>7.1f}x {hits:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+流量制限（RateLimitMiddleware）の負荷テスト。
+
+APIサーバーを別プロセスで起動し、次のクライアントを同時に動かします。
+  - 通常の読み取りクライアント: それぞれ別のIPアドレス（X-Forwarded-For）から制限内の頻度で GET /api/contests
+  - 不正なクライアント: 1つのIPアドレスから、毎回ランダムな Authorization ヘッダを付けて全力でリクエスト
+  - 大量のIPアドレスからの単発リクエスト: トークンバケットの保持数が上限で抑えられることを確認
+
+通常のクライアントの p50/p99 レイテンシ、不正なクライアントが 429 で拒否された割合、
+サーバープロセスのメモリ（RSS）を表示します。
+
+使い方（backend ディレクトリで実行。Linuxの /proc を使用）:
+    python scripts/rate_limit_load.py --duration-sec 30 --readers 20
+"""
+import argparse
+import asyncio
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+import httpx
+
+def _rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def _percentile(values: List[float], ratio: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+async def _wait_ready(client: httpx.AsyncClient, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.get("/")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+async def _reader(client: httpx.AsyncClient, ip: str, interval: float, deadline: float, latencies: List[float], statuses: dict) -> None:
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        response = await client.get("/api/contests", headers={"X-Forwarded-For": ip})
+        latencies.append((time.perf_counter() - started) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+async def _abuser(client: httpx.AsyncClient, deadline: float, statuses: dict) -> None:
+    while time.monotonic() < deadline:
+        # ランダムなトークンごとに別のバケットが作られると制限を回避できてしまう
+        headers = {"X-Forwarded-For": "203.0.113.1", "Authorization": f"Bearer {secrets.token_hex(16)}"}
+        response = await client.get("/api/contests", headers=headers)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+async def _flood(client: httpx.AsyncClient, count: int, duration_sec: float, statuses: dict) -> None:
+    # 負荷をかける期間に均等に分散させる
+    interval = duration_sec / max(count, 1)
+    for i in range(count):
+        started = time.perf_counter()
+        ip = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+        # DBに触れない存在しないパス（流量制限の対象になり、IPアドレスごとにバケットが作られる）
+        response = await client.get("/api/rate-limit-probe", headers={"X-Forwarded-For": ip})
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+async def load(args, server_pid: int) -> int:
+    limits = httpx.Limits(max_connections=args.readers + args.abusers + 8)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=30) as client:
+        await _wait_ready(client)
+        baseline_rss = _rss_mb(server_pid)
+        print(f"baseline: rss={baseline_rss:.1f} MB")
+
+        latencies: List[float] = []
+        reader_statuses: dict = {}
+        abuser_statuses: dict = {}
+        flood_statuses: dict = {}
+        deadline = time.monotonic() + args.duration_sec
+        await asyncio.gather(
+            *(_reader(client, f"192.0.2.{i % 250 + 1}", 1 / args.reader_rps, deadline, latencies, reader_statuses)
+              for i in range(args.readers)),
+            *(_abuser(client, deadline, abuser_statuses) for _ in range(args.abusers)),
+            _flood(client, args.flood_ips, args.duration_sec, flood_statuses),
+        )
+
+    rss = _rss_mb(server_pid)
+    abuser_total = sum(abuser_statuses.values())
+    abuser_allowed = abuser_total - abuser_statuses.get(429, 0)
+    # 1つのバケットで許可される上限（バースト + 平均 × 時間）。ランダムなトークンで回避できていればこれを大きく超える
+    abuser_budget = args.read_burst + args.read_rate * args.duration_sec
+    p50, p99 = _percentile(latencies, 0.5), _percentile(latencies, 0.99)
+    print(f"readers: {len(latencies)} requests, p50={p50:.1f} ms p99={p99:.1f} ms, statuses={reader_statuses}")
+    print(f"abuser (random bearer): {abuser_total} requests, {abuser_allowed} allowed (budget {abuser_budget:.0f})")
+    print(f"flood: {sum(flood_statuses.values())} distinct IPs, statuses={flood_statuses}")
+    print(f"after load: rss={rss:.1f} MB (+{rss - baseline_rss:.1f} MB)")
+
+    ok = p99 <= args.max_p99_ms and abuser_allowed <= abuser_budget * 1.1 and reader_statuses.get(429, 0) == 0
+    return 0 if ok else 1
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="流量制限の負荷テスト")
+    parser.add_argument("--duration-sec", type=int, default=30, help="負荷をかける秒数")
+    parser.add_argument("--readers", type=int, default=20, help="通常の読み取りクライアント数")
+    parser.add_argument("--reader-rps", type=float, default=5, help="読み取りクライアント1つあたりの毎秒リクエスト数（制限内）")
+    parser.add_argument("--abusers", type=int, default=4, help="ランダムなトークンを付けるクライアント数")
+    parser.add_argument("--flood-ips", type=int, default=5000, help="単発のリクエストを送るIPアドレス数")
+    parser.add_argument("--read-rate", type=float, default=10, help="/api/ の毎秒の平均（ROUTE_POLICIES と同じ値）")
+    parser.add_argument("--read-burst", type=int, default=40, help="/api/ のバースト（ROUTE_POLICIES と同じ値）")
+    parser.add_argument("--max-buckets", type=int, default=1000, help="サーバーのバケット数の上限（RATE_LIMIT_MAX_BUCKETS）")
+    parser.add_argument("--max-p99-ms", type=float, default=500, help="読み取りの p99 レイテンシの許容値")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_file.name}",
+        MOCK_CONTEST_API="true",
+        RATE_LIMIT_ENABLED="true",
+        RATE_LIMIT_REDIS_URL="",
+        RATE_LIMIT_TRUST_FORWARDED_FOR="true",
+        RATE_LIMIT_MAX_BUCKETS=str(args.max_buckets),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning",
+         "--timeout-keep-alive", "60"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        code = asyncio.run(load(args, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+        os.unlink(db_file.name)
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main()
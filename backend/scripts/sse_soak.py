@@ -0,0 +1,181 @@
+"""
+SSE配信（/api/contests/stream）のソークテスト。
+
+APIサーバーを別プロセスで起動し、アイドル状態のSSEクライアントを指定数だけ接続したまま保持して、
+サーバープロセスのメモリ（RSS）とCPU使用率を計測します。最後に変更通知を1回配信し、
+全クライアントに届くまでの時間と、上限を超えた接続が 503 で拒否されることを確認します。
+
+使い方（backend ディレクトリで実行。Linuxの /proc を使用）:
+    python scripts/sse_soak.py --clients 5000 --hold-sec 60
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+def _rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def _cpu_sec(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime, stime（クロック単位）
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+class SseClient:
+    """受信したイベントを数えるだけの最小限のSSEクライアント"""
+
+    def __init__(self):
+        self.connected = asyncio.Event()
+        self.received = asyncio.Event()
+        self.status: Optional[int] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def run(self, host: str, port: int) -> None:
+        try:
+            reader, self.writer = await asyncio.open_connection(host, port)
+            self.writer.write(
+                f"GET /api/contests/stream HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode()
+            )
+            await self.writer.drain()
+            status_line = await reader.readline()
+            self.status = int(status_line.split()[1])
+            self.connected.set()
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.startswith(b"event: contests"):
+                    self.received.set()
+        except (OSError, ValueError, IndexError):
+            self.connected.set()
+
+    def close(self) -> None:
+        if self.writer:
+            self.writer.close()
+
+async def _wait_ready(host: str, port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+async def _post(host: str, port: int, path: str) -> int:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    writer.close()
+    return status
+
+async def soak(args, server_pid: int) -> int:
+    host, port = "127.0.0.1", args.port
+    await _wait_ready(host, port)
+    baseline_rss = _rss_mb(server_pid)
+    print(f"baseline: rss={baseline_rss:.1f} MB")
+
+    clients: List[SseClient] = []
+    tasks = []
+    started = time.monotonic()
+    for i in range(args.clients):
+        client = SseClient()
+        clients.append(client)
+        tasks.append(asyncio.create_task(client.run(host, port)))
+        if i % 500 == 499:
+            await asyncio.gather(*(c.connected.wait() for c in clients))
+    await asyncio.gather(*(c.connected.wait() for c in clients))
+    accepted = sum(1 for c in clients if c.status == 200)
+    print(f"connected {accepted}/{args.clients} clients in {time.monotonic() - started:.1f}s")
+
+    connected_rss = _rss_mb(server_pid)
+    print(
+        f"connected: rss={connected_rss:.1f} MB "
+        f"({(connected_rss - baseline_rss) * 1024 / max(accepted, 1):.1f} KB per connection)"
+    )
+
+    # 接続したまま放置し、ハートビートのみのアイドル時のCPU使用率を計測する
+    cpu_before = _cpu_sec(server_pid)
+    await asyncio.sleep(args.hold_sec)
+    idle_cpu = (_cpu_sec(server_pid) - cpu_before) / args.hold_sec * 100
+    held_rss = _rss_mb(server_pid)
+    print(f"idle {args.hold_sec}s: cpu={idle_cpu:.1f}% rss={held_rss:.1f} MB")
+
+    # 上限を超えた接続は 503 で拒否される
+    extra = SseClient()
+    extra_task = asyncio.create_task(extra.run(host, port))
+    await extra.connected.wait()
+    print(f"connection over the cap: status={extra.status}")
+    extra.close()
+
+    # 変更通知を1回配信し、全クライアントに届くまでの時間を計測する
+    publish_started = time.monotonic()
+    status = await _post(host, port, "/api/admin/update-contests")
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(c.received.wait() for c in clients if c.status == 200)),
+            timeout=args.hold_sec
+        )
+        print(f"fan-out to {accepted} clients: {time.monotonic() - publish_started:.2f}s (update status {status})")
+    except asyncio.TimeoutError:
+        delivered = sum(1 for c in clients if c.received.is_set())
+        print(f"fan-out timed out: {delivered}/{accepted} clients received the change")
+
+    for client in clients:
+        client.close()
+    for task in tasks + [extra_task]:
+        task.cancel()
+    await asyncio.gather(*tasks, extra_task, return_exceptions=True)
+
+    leak_ok = accepted == min(args.clients, args.max_subscribers)
+    return 0 if leak_ok and extra.status == 503 else 1
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SSE配信のソークテスト")
+    parser.add_argument("--clients", type=int, default=5000, help="接続するアイドルクライアント数")
+    parser.add_argument("--max-subscribers", type=int, default=5000, help="サーバーの同時接続数の上限（BROADCAST_MAX_SUBSCRIBERS）")
+    parser.add_argument("--hold-sec", type=int, default=60, help="接続を保持してCPU使用率を計測する秒数")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    # クライアント側もファイルディスクリプタを大量に使う
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, args.clients * 2 + 100)), hard))
+
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_file.name}",
+        MOCK_CONTEST_API="true",
+        RATE_LIMIT_ENABLED="false",
+        BROADCAST_MAX_SUBSCRIBERS=str(args.max_subscribers),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning",
+         "--limit-concurrency", str(args.clients * 2 + 100)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        code = asyncio.run(soak(args, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+        os.unlink(db_file.name)
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main()